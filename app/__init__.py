@@ -12,6 +12,7 @@ import os
 
 from app.config import Config
 from app.exceptions import setup_error_handlers
+from app.services.jwt_service import setup_jwt_config
 
 
 def create_app(config_class=Config):
@@ -27,6 +28,9 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Configuración JWT resuelta una sola vez por app
+    setup_jwt_config(app)
+
     # Configurar CORS - SOLUCIÓN MEJORADA Y ROBUSTA
     # Leer los orígenes permitidos de la configuración
     allowed_origins = config_class.ALLOWED_ORIGINS
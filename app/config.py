@@ -28,6 +28,8 @@ class Config:
     # Configuración de negocio - Cierre de caja
     BASE_OBJETIVO = int(os.getenv('BASE_OBJETIVO', '450000'))
     UMBRAL_MENUDO = int(os.getenv('UMBRAL_MENUDO', '10000'))
+    # Reutilizar la solución del knapsack para conteos repetidos (reintentos, refrescos)
+    KNAPSACK_CACHE_ENABLED = os.getenv('KNAPSACK_CACHE_ENABLED', 'True').lower() == 'true'
 
     # Denominaciones de dinero colombiano
     DENOMINACIONES_MONEDAS = [50, 100, 200, 500, 1000]
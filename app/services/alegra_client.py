@@ -1,6 +1,7 @@
 """
 Cliente para la API de Alegra
 """
+import array
 import requests
 from requests.auth import HTTPBasicAuth
 from typing import Dict, List
@@ -21,6 +22,15 @@ from app.utils.formatters import (
 
 logger = logging.getLogger(__name__)
 
+# Índice de cada método de pago en el acumulador de process_invoices
+_METHOD_CODE = {
+    "credit-card": 0,
+    "debit-card": 1,
+    "transfer": 2,
+    "cash": 3
+}
+_CASH_CODE = _METHOD_CODE["cash"]
+
 
 class AlegraClient:
     """Cliente para interactuar con la API de Alegra"""
@@ -254,29 +264,35 @@ class AlegraClient:
                 )
 
         # Calcular totales SOLO con facturas activas
-        totals = {
-            "credit-card": 0,
-            "debit-card": 0,
-            "transfer": 0,
-            "cash": 0
-        }
+        # Acumulador contiguo de doubles indexado por _METHOD_CODE
+        sums = array.array('d', (0.0, 0.0, 0.0, 0.0))
 
         for inv in active_invoices:
-            payments = inv.get("payments", []) or []
+            payments = inv.get("payments")
+            if not payments:
+                continue
 
             for p in payments:
                 amount = safe_number(p.get("amount", 0))
                 pm_raw = p.get("paymentMethod", "")
-                method = normalize_payment_method(pm_raw)
+                code = _METHOD_CODE.get(normalize_payment_method(pm_raw))
 
-                if method in totals:
-                    totals[method] += amount
-                else:
+                if code is None:
                     # Métodos desconocidos van a 'cash' por defecto
-                    logger.debug(f"Método de pago desconocido '{pm_raw}' mapeado a 'cash'")
-                    totals["cash"] += amount
+                    logger.debug("Método de pago desconocido '%s' mapeado a 'cash'", pm_raw)
+                    code = _CASH_CODE
+
+                sums[code] += amount
+
+        totals = {
+            "credit-card": sums[0],
+            "debit-card": sums[1],
+            "transfer": sums[2],
+            "cash": sums[3]
+        }
 
-        logger.debug(f"Totales procesados (facturas activas): {totals}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Totales procesados (facturas activas): %s", totals)
 
         return {
             'totals': totals,
@@ -51,7 +51,7 @@ class AlegraDirectClient:
         url = f"{self.base_url}{endpoint}"
         
         try:
-            logger.debug(f"Petición a API directa: {url} con params: {params}")
+            logger.debug("Petición a API directa: %s con params: %s", url, params)
             
             response = requests.get(
                 url,
@@ -64,7 +64,7 @@ class AlegraDirectClient:
             response.raise_for_status()
             data = response.json()
             
-            logger.debug(f"Respuesta exitosa de API directa: {endpoint}")
+            logger.debug("Respuesta exitosa de API directa: %s", endpoint)
             return data
             
         except requests.exceptions.Timeout:
@@ -1,7 +1,10 @@
 """
 Servicio de cálculos de cierre de caja
 """
-from typing import Dict, Tuple
+from collections import ChainMap
+from functools import lru_cache
+from operator import itemgetter, mul
+from typing import Dict, Mapping, Tuple
 import logging
 
 from app.config import Config
@@ -10,10 +13,106 @@ from app.utils.formatters import format_cop
 
 logger = logging.getLogger(__name__)
 
+# Dict vacío compartido para lecturas con .get() encadenado (nunca se muta)
+_EMPTY: dict = {}
+
+
+@lru_cache(maxsize=256)
+def _construir_base_cacheada(items: Tuple[Tuple[int, int], ...], base_objetivo: int, umbral_menudo: int):
+    """
+    Memoiza construir_base_exacta para conteos repetidos (reintentos, refrescos)
+
+    Args:
+        items: Tupla ((denominación, cantidad), ...) de monedas y luego billetes, ya
+            que el orden define el desempate del knapsack
+        base_objetivo: Monto objetivo de la base
+        umbral_menudo: Umbral para considerar menudo
+
+    Returns:
+        Tupla (conteo_base, conteo_consignar, restante, exacto); los conteos se
+        comparten entre llamadas, así que solo se leen (ver _separar_conteos)
+    """
+    conteo_base, conteo_consignar, restante, exacto = construir_base_exacta(
+        dict(items), base_objetivo, umbral_menudo
+    )
+    return conteo_base, conteo_consignar, restante, exacto
+
+
+class _LazyCop:
+    """Monto que se formatea con format_cop solo si el logger emite el registro"""
+
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __str__(self):
+        return format_cop(self.valor)
+
+
+def _total_denominaciones(conteo: Dict[int, int]) -> int:
+    """
+    Suma denominación × cantidad de un conteo
+
+    Usa map(mul, ...) para que la reducción corra en C, sin el frame del
+    generador ni el desempaquetado de tuplas por cada denominación.
+
+    Args:
+        conteo: Dict {denominación: cantidad}
+
+    Returns:
+        Total en pesos del conteo
+    """
+    return sum(map(mul, conteo.keys(), conteo.values()))
+
+
+def _separar_conteos(
+    denominaciones: Tuple[int, ...],
+    conteo_base: Mapping[int, int],
+    conteo_consignar: Mapping[int, int]
+) -> Tuple[Dict[int, int], Dict[int, int], int, int]:
+    """
+    Extrae de la base y la consignación las cantidades de un grupo de denominaciones
+
+    Args:
+        denominaciones: Denominaciones del grupo (monedas o billetes)
+        conteo_base: Mapping {denominación: cantidad en base}
+        conteo_consignar: Mapping {denominación: cantidad a consignar}
+
+    Returns:
+        Tupla (base, consignar, total_base, total_consignar) del grupo
+    """
+    base = {}
+    consignar = {}
+    total_base = 0
+    total_consignar = 0
+    base_get = conteo_base.get
+    consignar_get = conteo_consignar.get
+
+    for d in denominaciones:
+        cb = base_get(d, 0)
+        cc = consignar_get(d, 0)
+        base[d] = cb
+        consignar[d] = cc
+        total_base += d * cb
+        total_consignar += d * cc
+
+    return base, consignar, total_base, total_consignar
+
 
 class CashCalculator:
     """Calculador de cierres de caja"""
 
+    # Atributos fijos: sin __dict__ por instancia y acceso por slot
+    __slots__ = (
+        'base_objetivo',
+        'umbral_menudo',
+        'denominaciones_monedas',
+        'denominaciones_billetes',
+        '_monedas_tuple',
+        '_billetes_tuple',
+    )
+
     def __init__(
         self,
         base_objetivo: int = None,
@@ -35,9 +134,14 @@ class CashCalculator:
         self.denominaciones_monedas = denominaciones_monedas or Config.DENOMINACIONES_MONEDAS
         self.denominaciones_billetes = denominaciones_billetes or Config.DENOMINACIONES_BILLETES
 
+        # Precalculados: tuplas inmutables para iterar
+        self._monedas_tuple = tuple(self.denominaciones_monedas)
+        self._billetes_tuple = tuple(self.denominaciones_billetes)
+
         logger.debug(
-            f"CashCalculator inicializado: base={format_cop(self.base_objetivo)}, "
-            f"umbral_menudo={format_cop(self.umbral_menudo)}"
+            "CashCalculator inicializado: base=%s, umbral_menudo=%s",
+            _LazyCop(self.base_objetivo),
+            _LazyCop(self.umbral_menudo)
         )
 
     def calcular_totales(
@@ -55,116 +159,145 @@ class CashCalculator:
         Returns:
             Tuple (total_monedas, total_billetes, total_general)
         """
-        total_monedas = sum(denom * cant for denom, cant in conteo_monedas.items())
-        total_billetes = sum(denom * cant for denom, cant in conteo_billetes.items())
+        total_monedas = _total_denominaciones(conteo_monedas)
+        total_billetes = _total_denominaciones(conteo_billetes)
         total_general = total_monedas + total_billetes
 
-        logger.info(
-            f"Totales calculados: monedas={format_cop(total_monedas)}, "
-            f"billetes={format_cop(total_billetes)}, "
-            f"total={format_cop(total_general)}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Totales calculados: monedas=%s, billetes=%s, total=%s",
+                format_cop(total_monedas),
+                format_cop(total_billetes),
+                format_cop(total_general)
+            )
 
         return total_monedas, total_billetes, total_general
 
     def calcular_base_y_consignacion(
         self,
         conteo_monedas: Dict[int, int],
-        conteo_billetes: Dict[int, int]
-    ) -> Dict:
+        conteo_billetes: Dict[int, int],
+        total_general: int = None
+    ) -> Tuple[Dict, Dict]:
         """
         Calcula la base y la consignación usando el algoritmo knapsack
 
         Args:
             conteo_monedas: Dict {denominación: cantidad}
             conteo_billetes: Dict {denominación: cantidad}
+            total_general: Total ya calculado con calcular_totales; si no se
+                pasa, se calcula aquí
 
         Returns:
-            Dict con toda la información de base y consignación
+            Tuple (base_info, consignar_info): información de la base y de la
+            consignación por separado, para que cada campo aparezca una sola
+            vez en la respuesta
         """
-        # Combinar todas las denominaciones
-        todas_denoms = {**conteo_monedas, **conteo_billetes}
-
-        # Calcular total general PRIMERO para validación
-        total_general_disponible = sum(denom * cant for denom, cant in todas_denoms.items())
+        # Atributos usados varias veces en el método, leídos una sola vez
+        base_objetivo = self.base_objetivo
+
+        # Calcular total general PRIMERO para validación (reutiliza el de calcular_totales).
+        # Monedas y billetes tienen denominaciones disjuntas, así que se suman por separado
+        # sin combinar los conteos
+        if total_general is None:
+            total_general_disponible = (
+                _total_denominaciones(conteo_monedas) + _total_denominaciones(conteo_billetes)
+            )
+        else:
+            total_general_disponible = total_general
+
+        if total_general_disponible <= base_objetivo:
+            # Todo el efectivo cabe en la base: no hay nada que decidir, se omite el knapsack.
+            # Vista de solo lectura sobre ambos conteos (billetes con precedencia, como en
+            # {**conteo_monedas, **conteo_billetes}) sin copiarlos
+            conteo_base = ChainMap(conteo_billetes, conteo_monedas)
+            conteo_consignar = _EMPTY
+            restante_base = base_objetivo - total_general_disponible
+            exacto = restante_base == 0
+        else:
+            # Resolver knapsack. Los pares (denominación, cantidad) se encadenan directamente
+            # en la clave del cache; el solver los combina con dict(), que conserva el orden
+            # y la precedencia de {**conteo_monedas, **conteo_billetes}
+            items = (*conteo_monedas.items(), *conteo_billetes.items())
+            if Config.KNAPSACK_CACHE_ENABLED:
+                conteo_base, conteo_consignar, restante_base, exacto = _construir_base_cacheada(
+                    items, base_objetivo, self.umbral_menudo
+                )
+            else:
+                conteo_base, conteo_consignar, restante_base, exacto = construir_base_exacta(
+                    dict(items), base_objetivo, self.umbral_menudo
+                )
 
-        # Resolver knapsack
-        conteo_base, conteo_consignar, restante_base, exacto = construir_base_exacta(
-            todas_denoms,
-            self.base_objetivo,
-            self.umbral_menudo
+        # Separar base y consignación en monedas y billetes, acumulando totales
+        # en la misma pasada. Cada grupo recorre su propia tupla de denominaciones,
+        # así que no hace falta clasificar cada denominación
+        base_monedas, consignar_monedas, total_base_monedas, total_consignar_monedas = _separar_conteos(
+            self._monedas_tuple, conteo_base, conteo_consignar
+        )
+        base_billetes, consignar_billetes, total_base_billetes, total_consignar_billetes = _separar_conteos(
+            self._billetes_tuple, conteo_base, conteo_consignar
         )
 
-        # Separar base en monedas y billetes
-        base_monedas = {d: conteo_base.get(d, 0) for d in self.denominaciones_monedas}
-        base_billetes = {d: conteo_base.get(d, 0) for d in self.denominaciones_billetes}
-
-        # Separar consignación en monedas y billetes
-        consignar_monedas = {d: conteo_consignar.get(d, 0) for d in self.denominaciones_monedas}
-        consignar_billetes = {d: conteo_consignar.get(d, 0) for d in self.denominaciones_billetes}
-
-        # Calcular totales de base
-        total_base_monedas = sum(d * c for d, c in base_monedas.items())
-        total_base_billetes = sum(d * c for d, c in base_billetes.items())
         total_base = total_base_monedas + total_base_billetes
-
-        # Calcular totales de consignación
-        total_consignar_sin_ajustes = sum(
-            d * c for d, c in consignar_monedas.items()
-        ) + sum(
-            d * c for d, c in consignar_billetes.items()
-        )
+        total_consignar_sin_ajustes = total_consignar_monedas + total_consignar_billetes
 
         # NUEVA VALIDACIÓN: Determinar el estado de la base
-        if total_general_disponible == self.base_objetivo:
+        # La magnitud de la diferencia se calcula y formatea una sola vez
+        diferencia_base = total_general_disponible - base_objetivo
+        magnitud = abs(diferencia_base)
+        magnitud_fmt = format_cop(magnitud)
+        base_fmt = format_cop(base_objetivo)
+
+        if diferencia_base == 0:
             # Caso 1: Total exacto de 450,000
             base_status = "exacta"
-            diferencia_base = 0
-            mensaje_base = f"La base es exacta: {format_cop(self.base_objetivo)}"
+            mensaje_base = f"La base es exacta: {base_fmt}"
 
-        elif total_general_disponible < self.base_objetivo:
+        elif diferencia_base < 0:
             # Caso 2: Falta dinero para completar la base
             base_status = "faltante"
-            diferencia_base = -(self.base_objetivo - total_general_disponible)
-            faltante = self.base_objetivo - total_general_disponible
-            mensaje_base = f"Falta {format_cop(faltante)} para completar la base de {format_cop(self.base_objetivo)}"
+            mensaje_base = f"Falta {magnitud_fmt} para completar la base de {base_fmt}"
 
         else:
             # Caso 3: Sobra dinero por encima de la base
             base_status = "sobrante"
-            diferencia_base = total_general_disponible - self.base_objetivo
-            sobrante = total_general_disponible - self.base_objetivo
-            mensaje_base = f"Sobra {format_cop(sobrante)} por encima de la base de {format_cop(self.base_objetivo)}"
+            mensaje_base = f"Sobra {magnitud_fmt} por encima de la base de {base_fmt}"
 
-        resultado = {
+        base_info = {
             'base_monedas': base_monedas,
             'base_billetes': base_billetes,
-            'total_base_monedas': int(total_base_monedas),
-            'total_base_billetes': int(total_base_billetes),
-            'total_base': int(total_base),
+            'total_base_monedas': total_base_monedas,
+            'total_base_billetes': total_base_billetes,
+            'total_base': total_base,
             'total_base_formatted': format_cop(total_base),
-            'exact_base_obtained': bool(exacto),
-            'restante_para_base': int(restante_base),
+            'exact_base_obtained': exacto,
+            'restante_para_base': restante_base,
             'base_status': base_status,
-            'diferencia_base': int(diferencia_base),
-            'diferencia_base_formatted': format_cop(abs(diferencia_base)),
-            'mensaje_base': mensaje_base,
+            'diferencia_base': diferencia_base,
+            'diferencia_base_formatted': magnitud_fmt,
+            'mensaje_base': mensaje_base
+        }
+
+        consignar_info = {
             'consignar_monedas': consignar_monedas,
             'consignar_billetes': consignar_billetes,
-            'total_consignar_sin_ajustes': int(total_consignar_sin_ajustes),
+            'total_consignar_sin_ajustes': total_consignar_sin_ajustes,
             'total_consignar_sin_ajustes_formatted': format_cop(total_consignar_sin_ajustes)
         }
 
         # Logging mejorado
-        logger.info(
-            f"Validación de base: {mensaje_base}"
-        )
-        logger.info(
-            f"Base calculada: {format_cop(total_base)} "
-            f"({'exacta' if exacto else f'aproximada, restante knapsack: {format_cop(restante_base)}'})"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Validación de base: %s", mensaje_base)
+            if exacto:
+                logger.info("Base calculada: %s (exacta)", base_info['total_base_formatted'])
+            else:
+                logger.info(
+                    "Base calculada: %s (aproximada, restante knapsack: %s)",
+                    base_info['total_base_formatted'],
+                    format_cop(restante_base)
+                )
 
-        return resultado
+        return base_info, consignar_info
 
     def aplicar_ajustes(
         self,
@@ -194,13 +327,17 @@ class CashCalculator:
         # NO se restan gastos ni préstamos porque ya fueron sacados físicamente antes de contar
         efectivo_para_consignar_final = total_consignar_sin_ajustes
 
-        logger.info(
-            f"Ajustes aplicados: "
-            f"sin_ajustes={format_cop(total_consignar_sin_ajustes)}, "
-            f"gastos={format_cop(gastos_operativos)} (ya sacados físicamente antes de contar), "
-            f"prestamos={format_cop(prestamos)} (ya sacados físicamente antes de contar), "
-            f"final={format_cop(efectivo_para_consignar_final)}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Ajustes aplicados: sin_ajustes=%s, "
+                "gastos=%s (ya sacados físicamente antes de contar), "
+                "prestamos=%s (ya sacados físicamente antes de contar), "
+                "final=%s",
+                format_cop(total_consignar_sin_ajustes),
+                format_cop(gastos_operativos),
+                format_cop(prestamos),
+                format_cop(efectivo_para_consignar_final)
+            )
 
         return int(efectivo_para_consignar_final)
 
@@ -238,12 +375,17 @@ class CashCalculator:
         """
         venta_efectivo = total_general - excedente - total_base + gastos_operativos + prestamos
 
-        logger.info(
-            f"Venta efectivo calculada para Alegra: {format_cop(venta_efectivo)} "
-            f"(total={format_cop(total_general)} - excedente={format_cop(excedente)} - "
-            f"base={format_cop(total_base)} + gastos={format_cop(gastos_operativos)} + "
-            f"prestamos={format_cop(prestamos)})"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Venta efectivo calculada para Alegra: %s "
+                "(total=%s - excedente=%s - base=%s + gastos=%s + prestamos=%s)",
+                format_cop(venta_efectivo),
+                format_cop(total_general),
+                format_cop(excedente),
+                format_cop(total_base),
+                format_cop(gastos_operativos),
+                format_cop(prestamos)
+            )
 
         return int(venta_efectivo)
 
@@ -276,9 +418,10 @@ class CashCalculator:
         Returns:
             Dict con toda la información del cierre
         """
-        logger.info("=" * 60)
-        logger.info("Iniciando procesamiento de cierre de caja")
-        logger.info("=" * 60)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("=" * 60)
+            logger.info("Iniciando procesamiento de cierre de caja")
+            logger.info("=" * 60)
 
         # 1. Calcular totales
         total_monedas, total_billetes, total_general = self.calcular_totales(
@@ -287,14 +430,15 @@ class CashCalculator:
         )
 
         # 2. Calcular base y consignación
-        base_info = self.calcular_base_y_consignacion(
+        base_info, consignar_info = self.calcular_base_y_consignacion(
             conteo_monedas,
-            conteo_billetes
+            conteo_billetes,
+            total_general
         )
 
         # 3. Aplicar ajustes
         efectivo_para_consignar_final = self.aplicar_ajustes(
-            base_info['total_consignar_sin_ajustes'],
+            consignar_info['total_consignar_sin_ajustes'],
             excedente,
             gastos_operativos,
             prestamos
@@ -311,24 +455,27 @@ class CashCalculator:
         )
 
         # 5. Construir respuesta completa
+        # Sin ajustes que restar, el monto final coincide con el total sin ajustes:
+        # se reutiliza el texto ya formateado
+        if efectivo_para_consignar_final == consignar_info['total_consignar_sin_ajustes']:
+            efectivo_final_fmt = consignar_info['total_consignar_sin_ajustes_formatted']
+        else:
+            efectivo_final_fmt = format_cop(efectivo_para_consignar_final)
+
+        consignar_info['efectivo_para_consignar_final'] = efectivo_para_consignar_final
+        consignar_info['efectivo_para_consignar_final_formatted'] = efectivo_final_fmt
+
         resultado = {
             'input_coins': conteo_monedas,
             'input_bills': conteo_billetes,
             'totals': {
-                'total_monedas': int(total_monedas),
-                'total_billetes': int(total_billetes),
-                'total_general': int(total_general),
+                'total_monedas': total_monedas,
+                'total_billetes': total_billetes,
+                'total_general': total_general,
                 'total_general_formatted': format_cop(total_general)
             },
             'base': base_info,
-            'consignar': {
-                'consignar_monedas': base_info['consignar_monedas'],
-                'consignar_billetes': base_info['consignar_billetes'],
-                'total_consignar_sin_ajustes': base_info['total_consignar_sin_ajustes'],
-                'total_consignar_sin_ajustes_formatted': base_info['total_consignar_sin_ajustes_formatted'],
-                'efectivo_para_consignar_final': efectivo_para_consignar_final,
-                'efectivo_para_consignar_final_formatted': format_cop(efectivo_para_consignar_final)
-            },
+            'consignar': consignar_info,
             'adjustments': {
                 'excedente': int(excedente),
                 'excedente_formatted': format_cop(excedente),
@@ -341,12 +488,33 @@ class CashCalculator:
             }
         }
 
-        logger.info("✓ Cierre de caja procesado exitosamente")
-        logger.info("=" * 60)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("✓ Cierre de caja procesado exitosamente")
+            logger.info("=" * 60)
 
         return resultado
 
 
+# Claves de totales por tipo de excedente; el índice es el acumulador en procesar_excedentes
+_EXCEDENTES_CLAVES = (
+    "excedente_efectivo",
+    "excedente_datafono",
+    "excedente_nequi",
+    "excedente_daviplata",
+    "excedente_qr",
+)
+
+# (tipo, subtipo) -> (índice en _EXCEDENTES_CLAVES, etiqueta tipo, etiqueta subtipo)
+# Los tipos sin subtipo se registran con subtipo None y lo ignoran
+_EXCEDENTES_DISPATCH = {
+    ("efectivo", None): (0, "Efectivo", None),
+    ("datafono", None): (1, "Datafono", None),
+    ("qr_transferencias", "nequi"): (2, "Transferencia", "Nequi"),
+    ("qr_transferencias", "daviplata"): (3, "Transferencia", "Daviplata"),
+    ("qr_transferencias", "qr"): (4, "Transferencia", "QR"),
+}
+
+
 def procesar_excedentes(excedentes_list):
     """
     Recibe una lista de excedentes y retorna los totales por tipo.
@@ -371,69 +539,59 @@ def procesar_excedentes(excedentes_list):
             ]
         }
     """
-    totales = {
-        "total_excedente": 0,
-        "excedente_efectivo": 0,
-        "excedente_datafono": 0,
-        "excedente_nequi": 0,
-        "excedente_daviplata": 0,
-        "excedente_qr": 0,
-        "excedentes_detalle": []
-    }
+    # Suma agrupada en acumuladores locales; el dict de totales se arma al final
+    sumas = [0] * len(_EXCEDENTES_CLAVES)
+    total_excedente = 0
+    detalle = []
+    agregar_detalle = detalle.append
+    dispatch = _EXCEDENTES_DISPATCH.get
 
     for exc in excedentes_list:
         valor = int(exc.get("valor", 0))
         if valor > 0:
-            totales["total_excedente"] += valor
-
-            if exc["tipo"] == "efectivo":
-                totales["excedente_efectivo"] += valor
-                totales["excedentes_detalle"].append({
-                    "tipo": "Efectivo",
-                    "valor": valor
-                })
-            elif exc["tipo"] == "datafono":
-                totales["excedente_datafono"] += valor
-                totales["excedentes_detalle"].append({
-                    "tipo": "Datafono",
-                    "valor": valor
-                })
-            elif exc["tipo"] == "qr_transferencias":
-                subtipo = exc.get("subtipo", "")
-                if subtipo == "nequi":
-                    totales["excedente_nequi"] += valor
-                    totales["excedentes_detalle"].append({
-                        "tipo": "Transferencia",
-                        "subtipo": "Nequi",
-                        "valor": valor
-                    })
-                elif subtipo == "daviplata":
-                    totales["excedente_daviplata"] += valor
-                    totales["excedentes_detalle"].append({
-                        "tipo": "Transferencia",
-                        "subtipo": "Daviplata",
-                        "valor": valor
-                    })
-                elif subtipo == "qr":
-                    totales["excedente_qr"] += valor
-                    totales["excedentes_detalle"].append({
-                        "tipo": "Transferencia",
-                        "subtipo": "QR",
-                        "valor": valor
-                    })
-
-    logger.info(
-        f"Excedentes procesados: total={format_cop(totales['total_excedente'])}, "
-        f"efectivo={format_cop(totales['excedente_efectivo'])}, "
-        f"datafono={format_cop(totales['excedente_datafono'])}, "
-        f"nequi={format_cop(totales['excedente_nequi'])}, "
-        f"daviplata={format_cop(totales['excedente_daviplata'])}, "
-        f"qr={format_cop(totales['excedente_qr'])}"
-    )
+            total_excedente += valor
+
+            tipo = exc["tipo"]
+            destino = dispatch((tipo, None))
+            if destino is None:
+                destino = dispatch((tipo, exc.get("subtipo", "")))
+            if destino is None:
+                continue
+
+            indice, tipo_label, subtipo_label = destino
+            sumas[indice] += valor
+            if subtipo_label is None:
+                agregar_detalle({"tipo": tipo_label, "valor": valor})
+            else:
+                agregar_detalle({"tipo": tipo_label, "subtipo": subtipo_label, "valor": valor})
+
+    totales = {"total_excedente": total_excedente}
+    totales.update(zip(_EXCEDENTES_CLAVES, sumas))
+    totales["excedentes_detalle"] = detalle
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Excedentes procesados: total=%s, efectivo=%s, datafono=%s, "
+            "nequi=%s, daviplata=%s, qr=%s",
+            format_cop(totales['total_excedente']),
+            format_cop(totales['excedente_efectivo']),
+            format_cop(totales['excedente_datafono']),
+            format_cop(totales['excedente_nequi']),
+            format_cop(totales['excedente_daviplata']),
+            format_cop(totales['excedente_qr'])
+        )
 
     return totales
 
 
+# tipo -> (clave en totales, signo en total_desfase, etiqueta)
+# Faltante es negativo, sobrante es positivo
+_DESFASES_DISPATCH = {
+    "faltante_caja": ("faltante_caja", -1, "Faltante en caja"),
+    "sobrante_caja": ("sobrante_caja", 1, "Sobrante en caja"),
+}
+
+
 def procesar_desfases(desfases_list):
     """
     Recibe una lista de desfases y retorna los totales por tipo.
@@ -462,39 +620,50 @@ def procesar_desfases(desfases_list):
         "desfases_detalle": []
     }
 
+    detalle = totales["desfases_detalle"]
+
     for desfase in desfases_list:
         valor = int(desfase.get("valor", 0))
-        tipo = desfase.get("tipo", "")
-        nota = desfase.get("nota", "")
 
         if valor > 0:
-            if tipo == "faltante_caja":
-                totales["faltante_caja"] += valor
-                totales["total_desfase"] -= valor  # Faltante es negativo
-                totales["desfases_detalle"].append({
-                    "tipo": "Faltante en caja",
-                    "valor": valor,
-                    "nota": nota
-                })
-            elif tipo == "sobrante_caja":
-                totales["sobrante_caja"] += valor
-                totales["total_desfase"] += valor  # Sobrante es positivo
-                totales["desfases_detalle"].append({
-                    "tipo": "Sobrante en caja",
-                    "valor": valor,
-                    "nota": nota
-                })
-
-    logger.info(
-        f"Desfases procesados: total={format_cop(totales['total_desfase'])}, "
-        f"faltante={format_cop(totales['faltante_caja'])}, "
-        f"sobrante={format_cop(totales['sobrante_caja'])}"
-    )
+            destino = _DESFASES_DISPATCH.get(desfase.get("tipo", ""))
+            if destino is None:
+                continue
+
+            clave, signo, tipo_label = destino
+            totales[clave] += valor
+            totales["total_desfase"] += signo * valor
+            detalle.append({
+                "tipo": tipo_label,
+                "valor": valor,
+                "nota": desfase.get("nota", "")
+            })
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Desfases procesados: total=%s, faltante=%s, sobrante=%s",
+            format_cop(totales['total_desfase']),
+            format_cop(totales['faltante_caja']),
+            format_cop(totales['sobrante_caja'])
+        )
 
     return totales
 
 
 
+# Métodos de pago registrados manualmente, en el orden en que se desempaquetan
+_METODOS_PAGO_KEYS = (
+    "addi_datafono",
+    "nequi_luz_helena",
+    "daviplata_jose",
+    "qr_julieth",
+    "tarjeta_debito",
+    "tarjeta_credito"
+)
+_METODOS_PAGO_CEROS = dict.fromkeys(_METODOS_PAGO_KEYS, 0)
+_METODOS_PAGO_GETTER = itemgetter(*_METODOS_PAGO_KEYS)
+
+
 def calcular_totales_metodos_pago(metodos_pago, excedentes_procesados=None):
     """
     Calcula los totales de transferencias y datafono.
@@ -525,12 +694,9 @@ def calcular_totales_metodos_pago(metodos_pago, excedentes_procesados=None):
             "total_datafono_con_excedente": tarjetas + addi + excedente_datafono (si hay excedentes)
         }
     """
-    addi = int(metodos_pago.get("addi_datafono", 0))
-    nequi = int(metodos_pago.get("nequi_luz_helena", 0))
-    daviplata = int(metodos_pago.get("daviplata_jose", 0))
-    qr = int(metodos_pago.get("qr_julieth", 0))
-    tarjeta_debito = int(metodos_pago.get("tarjeta_debito", 0))
-    tarjeta_credito = int(metodos_pago.get("tarjeta_credito", 0))
+    addi, nequi, daviplata, qr, tarjeta_debito, tarjeta_credito = map(
+        int, _METODOS_PAGO_GETTER(_METODOS_PAGO_CEROS | metodos_pago)
+    )
 
     # Total transferencias para validar con Alegra (incluye Addi porque Alegra lo registra como transferencia)
     total_transferencias_registradas = nequi + daviplata + qr + addi
@@ -542,8 +708,7 @@ def calcular_totales_metodos_pago(metodos_pago, excedentes_procesados=None):
     total_datafono_real = tarjeta_debito + tarjeta_credito + addi
 
     # Preparar resultado base
-    resultado = {
-        **metodos_pago,
+    resultado = metodos_pago | {
         "total_transferencias_registradas": total_transferencias_registradas,
         "total_transferencias_registradas_formatted": format_cop(total_transferencias_registradas),
         "total_solo_tarjetas": total_solo_tarjetas,
@@ -565,27 +730,49 @@ def calcular_totales_metodos_pago(metodos_pago, excedentes_procesados=None):
         # Total transferencias incluyendo excedentes (nequi, daviplata, qr)
         total_transferencias_con_excedente = total_transferencias_registradas + excedente_nequi + excedente_daviplata + excedente_qr
 
+        # Los montos ya formateados en resultado se reutilizan en los detalles
+        datafono_con_excedente_fmt = format_cop(total_datafono_con_excedente)
+        transferencias_con_excedente_fmt = format_cop(total_transferencias_con_excedente)
+
         resultado.update({
             "total_datafono_con_excedente": total_datafono_con_excedente,
-            "total_datafono_con_excedente_formatted": format_cop(total_datafono_con_excedente),
+            "total_datafono_con_excedente_formatted": datafono_con_excedente_fmt,
             "total_transferencias_con_excedente": total_transferencias_con_excedente,
-            "total_transferencias_con_excedente_formatted": format_cop(total_transferencias_con_excedente),
-            "detalle_datafono": f"{format_cop(total_datafono_real)} + Excedente {format_cop(excedente_datafono)} = {format_cop(total_datafono_con_excedente)}",
-            "detalle_transferencias": f"{format_cop(total_transferencias_registradas)} + Excedentes {format_cop(excedente_nequi + excedente_daviplata + excedente_qr)} = {format_cop(total_transferencias_con_excedente)}"
+            "total_transferencias_con_excedente_formatted": transferencias_con_excedente_fmt,
+            "detalle_datafono": f"{resultado['total_datafono_real_formatted']} + Excedente {format_cop(excedente_datafono)} = {datafono_con_excedente_fmt}",
+            "detalle_transferencias": f"{resultado['total_transferencias_registradas_formatted']} + Excedentes {format_cop(excedente_nequi + excedente_daviplata + excedente_qr)} = {transferencias_con_excedente_fmt}"
         })
 
-    logger.info(
-        f"Totales métodos de pago calculados: "
-        f"transferencias_para_alegra={format_cop(total_transferencias_registradas)} "
-        f"(nequi={format_cop(nequi)}, daviplata={format_cop(daviplata)}, "
-        f"qr={format_cop(qr)}, addi={format_cop(addi)}), "
-        f"solo_tarjetas={format_cop(total_solo_tarjetas)}, "
-        f"datafono_real={format_cop(total_datafono_real)}"
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Totales métodos de pago calculados: transferencias_para_alegra=%s "
+            "(nequi=%s, daviplata=%s, qr=%s, addi=%s), solo_tarjetas=%s, datafono_real=%s",
+            resultado["total_transferencias_registradas_formatted"],
+            format_cop(nequi),
+            format_cop(daviplata),
+            format_cop(qr),
+            format_cop(addi),
+            resultado["total_solo_tarjetas_formatted"],
+            resultado["total_datafono_real_formatted"]
+        )
 
     return resultado
 
 
+def _alegra_total(results, metodo):
+    """
+    Total reportado por Alegra para un método de pago
+
+    Args:
+        results: Dict "results" de la respuesta de Alegra
+        metodo: Método de pago ("cash", "transfer", "debit-card", "credit-card")
+
+    Returns:
+        Total del método, 0 si no viene o viene vacío
+    """
+    return (results.get(metodo) or _EMPTY).get("total", 0)
+
+
 def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, excedentes_procesados=None, gastos_operativos=0, prestamos=0, desfases_procesados=None):
     """
     Valida si el cierre es exitoso comparando Alegra con lo registrado.
@@ -631,13 +818,10 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
         }
     """
     # Obtener totales de Alegra
-    efectivo_alegra = datos_alegra.get("results", {}).get("cash", {}).get("total", 0)
-    transferencia_alegra = datos_alegra.get("results", {}).get("transfer", {}).get("total", 0)
-
-    datafono_alegra = (
-        datos_alegra.get("results", {}).get("debit-card", {}).get("total", 0) +
-        datos_alegra.get("results", {}).get("credit-card", {}).get("total", 0)
-    )
+    results = datos_alegra.get("results") or _EMPTY
+    efectivo_alegra = _alegra_total(results, "cash")
+    transferencia_alegra = _alegra_total(results, "transfer")
+    datafono_alegra = _alegra_total(results, "debit-card") + _alegra_total(results, "credit-card")
 
     # Obtener totales registrados
     transferencias_registradas = metodos_pago_calculados.get("total_transferencias_registradas", 0)  # Incluye Addi
@@ -655,7 +839,7 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
 
     if cash_result and excedentes_procesados:
         excedente_efectivo = excedentes_procesados.get("excedente_efectivo", 0)
-        efectivo_para_consignar = cash_result.get("consignar", {}).get("efectivo_para_consignar_final", 0)
+        efectivo_para_consignar = cash_result.get("consignar", _EMPTY).get("efectivo_para_consignar_final", 0)
 
         # Obtener desfases si existen
         if desfases_procesados:
@@ -686,25 +870,26 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
         "mensaje": ""
     }
 
-    if not efectivo_validado and diff_efectivo >= 100:
+    # efectivo_validado es False solo cuando diff_efectivo >= 100, no hace falta volver a comparar
+    if not efectivo_validado:
         # Solo sugerir desfase si no se enviaron desfases o si los enviados no coinciden
         if not desfases_procesados or desfases_procesados.get("total_desfase", 0) == 0:
             # Determinar tipo de desfase
+            valor_desfase = diff_efectivo
+            valor_desfase_fmt = format_cop(valor_desfase)
             if diff_efectivo_raw < 0:
                 # Falta dinero en caja
                 tipo_desfase = "faltante_caja"
-                valor_desfase = abs(diff_efectivo_raw)
                 mensaje_desfase = (
-                    f"⚠️ DESFASE DETECTADO: Falta {format_cop(valor_desfase)} en caja. "
+                    f"⚠️ DESFASE DETECTADO: Falta {valor_desfase_fmt} en caja. "
                     f"Por favor, registra este faltante en el campo 'desfases' con una nota "
                     f"explicativa indicando el responsable o la causa del faltante."
                 )
             else:
                 # Sobra dinero en caja
                 tipo_desfase = "sobrante_caja"
-                valor_desfase = abs(diff_efectivo_raw)
                 mensaje_desfase = (
-                    f"⚠️ DESFASE DETECTADO: Sobra {format_cop(valor_desfase)} en caja. "
+                    f"⚠️ DESFASE DETECTADO: Sobra {valor_desfase_fmt} en caja. "
                     f"Por favor, registra este sobrante en el campo 'desfases' con una nota "
                     f"explicativa indicando el origen del sobrante."
                 )
@@ -713,18 +898,25 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
                 "detectado": True,
                 "tipo": tipo_desfase,
                 "valor": int(valor_desfase),
-                "valor_formatted": format_cop(valor_desfase),
+                "valor_formatted": valor_desfase_fmt,
                 "mensaje": mensaje_desfase
             }
 
             logger.warning(
-                f"Desfase detectado: {tipo_desfase} de {format_cop(valor_desfase)}"
+                "Desfase detectado: %s de %s", tipo_desfase, desfase_sugerido["valor_formatted"]
             )
 
     # Calcular diferencias de otros métodos
     diff_transferencia = abs(transferencia_alegra - transferencias_registradas)
     diff_datafono = abs(datafono_alegra - solo_tarjetas)
-
+    fmt_diff_t = format_cop(diff_transferencia)
+    fmt_diff_d = format_cop(diff_datafono)
+    fmt_transferencia_alegra = format_cop(transferencia_alegra)
+    fmt_transferencias_registradas = format_cop(transferencias_registradas)
+    fmt_datafono_alegra = format_cop(datafono_alegra)
+    fmt_solo_tarjetas = format_cop(solo_tarjetas)
+    transferencia_significativa = diff_transferencia >= 100
+    datafono_significativo = diff_datafono >= 100
 
     # VALIDACIÓN GLOBAL: El cierre es exitoso si:
     # 1. Efectivo validado correctamente (CRÍTICO)
@@ -767,16 +959,16 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
             "alegra": transferencia_alegra,
             "registrado": transferencias_registradas,
             "diferencia": diff_transferencia,
-            "diferencia_formatted": format_cop(diff_transferencia),
-            "es_significativa": diff_transferencia >= 100,
+            "diferencia_formatted": fmt_diff_t,
+            "es_significativa": transferencia_significativa,
             "detalle": "Alegra transfer vs (Nequi + Daviplata + QR + Addi)"
         },
         "datafono": {
             "alegra": datafono_alegra,
             "registrado": solo_tarjetas,
             "diferencia": diff_datafono,
-            "diferencia_formatted": format_cop(diff_datafono),
-            "es_significativa": diff_datafono >= 100,
+            "diferencia_formatted": fmt_diff_d,
+            "es_significativa": datafono_significativo,
             "detalle": "Alegra debit+credit vs (Tarjeta débito + Tarjeta crédito)"
         },
         "datafono_real": {
@@ -790,43 +982,45 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
     mensajes = []
     medios_con_diferencia = []  # Lista de medios de pago con diferencias
 
+    dif_efectivo = diferencias["efectivo"]
+
     # CRÍTICO: Validación de efectivo
-    if not diferencias["efectivo"]["es_valido"]:
+    if not efectivo_validado:
         medios_con_diferencia.append("EFECTIVO")
         # Construir mensaje con préstamos y desfases
         prestamos_str = ""
         if prestamos > 0:
-            prestamos_str = f" - Préstamos: {diferencias['efectivo']['prestamos_formatted']}"
+            prestamos_str = f" - Préstamos: {dif_efectivo['prestamos_formatted']}"
 
         desfase_str = ""
         if total_desfase != 0:
-            desfase_str = f" + Desfases: {diferencias['efectivo']['total_desfase_formatted']}"
+            desfase_str = f" + Desfases: {dif_efectivo['total_desfase_formatted']}"
 
         mensajes.append(
-            f"⚠️ EFECTIVO NO COINCIDE: Diferencia de {diferencias['efectivo']['diferencia_formatted']} "
-            f"(Alegra: {diferencias['efectivo']['efectivo_alegra_formatted']} + "
-            f"Excedente: {diferencias['efectivo']['excedente_efectivo_formatted']} - "
-            f"Gastos: {diferencias['efectivo']['gastos_operativos_formatted']}"
+            f"⚠️ EFECTIVO NO COINCIDE: Diferencia de {dif_efectivo['diferencia_formatted']} "
+            f"(Alegra: {dif_efectivo['efectivo_alegra_formatted']} + "
+            f"Excedente: {dif_efectivo['excedente_efectivo_formatted']} - "
+            f"Gastos: {dif_efectivo['gastos_operativos_formatted']}"
             f"{prestamos_str}{desfase_str} = "
-            f"{diferencias['efectivo']['suma_efectivo_ajustada_formatted']} vs "
-            f"Consignar: {diferencias['efectivo']['efectivo_para_consignar_formatted']})"
+            f"{dif_efectivo['suma_efectivo_ajustada_formatted']} vs "
+            f"Consignar: {dif_efectivo['efectivo_para_consignar_formatted']})"
         )
 
     # ADVERTENCIAS: Diferencias en otros métodos
-    if diferencias["transferencias"]["es_significativa"]:
+    if transferencia_significativa:
         medios_con_diferencia.append("TRANSFERENCIAS")
         mensajes.append(
-            f"⚠️ TRANSFERENCIAS NO COINCIDEN: Diferencia de {diferencias['transferencias']['diferencia_formatted']} "
-            f"(Alegra: {format_cop(diferencias['transferencias']['alegra'])} vs "
-            f"Registrado: {format_cop(diferencias['transferencias']['registrado'])})"
+            f"⚠️ TRANSFERENCIAS NO COINCIDEN: Diferencia de {fmt_diff_t} "
+            f"(Alegra: {fmt_transferencia_alegra} vs "
+            f"Registrado: {fmt_transferencias_registradas})"
         )
 
-    if diferencias["datafono"]["es_significativa"]:
+    if datafono_significativo:
         medios_con_diferencia.append("DATAFONO")
         mensajes.append(
-            f"⚠️ DATAFONO NO COINCIDE: Diferencia de {diferencias['datafono']['diferencia_formatted']} "
-            f"(Alegra: {format_cop(diferencias['datafono']['alegra'])} vs "
-            f"Registrado: {format_cop(diferencias['datafono']['registrado'])})"
+            f"⚠️ DATAFONO NO COINCIDE: Diferencia de {fmt_diff_d} "
+            f"(Alegra: {fmt_datafono_alegra} vs "
+            f"Registrado: {fmt_solo_tarjetas})"
         )
 
     # Mensaje principal con lista de medios con diferencia y cantidades
@@ -834,65 +1028,66 @@ def validar_cierre(datos_alegra, metodos_pago_calculados, cash_result=None, exce
         detalles_diferencias = []
 
         # Agregar efectivo si tiene diferencia
-        if not diferencias["efectivo"]["es_valido"]:
+        if not efectivo_validado:
             detalles_diferencias.append(
-                f"EFECTIVO (diferencia: {diferencias['efectivo']['diferencia_formatted']})"
+                f"EFECTIVO (diferencia: {dif_efectivo['diferencia_formatted']})"
             )
 
         # Agregar transferencias si tiene diferencia
-        if diferencias["transferencias"]["es_significativa"]:
-            detalles_diferencias.append(
-                f"TRANSFERENCIAS (diferencia: {diferencias['transferencias']['diferencia_formatted']})"
-            )
+        if transferencia_significativa:
+            detalles_diferencias.append(f"TRANSFERENCIAS (diferencia: {fmt_diff_t})")
 
         # Agregar datafono si tiene diferencia
-        if diferencias["datafono"]["es_significativa"]:
-            detalles_diferencias.append(
-                f"DATAFONO (diferencia: {diferencias['datafono']['diferencia_formatted']})"
-            )
+        if datafono_significativo:
+            detalles_diferencias.append(f"DATAFONO (diferencia: {fmt_diff_d})")
 
         mensaje_validacion = f"Diferencias encontradas en: {' | '.join(detalles_diferencias)}"
     else:
         mensaje_validacion = "Cierre validado correctamente"
 
-    logger.info(
-        f"Validación de cierre: {validation_status.upper()} - {mensaje_validacion}"
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Validación de cierre: %s - %s", validation_status.upper(), mensaje_validacion
+        )
 
-    # Construir mensaje de logging con préstamos y desfases
-    log_parts = [
-        f"  EFECTIVO: Alegra {format_cop(efectivo_alegra)}",
-        f"+ Excedente {format_cop(excedente_efectivo)}",
-        f"- Gastos {format_cop(gastos_operativos)}"
-    ]
+        # Construir mensaje de logging con préstamos y desfases
+        # (reutiliza los montos ya formateados en diferencias)
+        log_parts = [
+            f"  EFECTIVO: Alegra {dif_efectivo['efectivo_alegra_formatted']}",
+            f"+ Excedente {dif_efectivo['excedente_efectivo_formatted']}",
+            f"- Gastos {dif_efectivo['gastos_operativos_formatted']}"
+        ]
 
-    if prestamos > 0:
-        log_parts.append(f"- Préstamos {format_cop(prestamos)}")
+        if prestamos > 0:
+            log_parts.append(f"- Préstamos {dif_efectivo['prestamos_formatted']}")
 
-    if total_desfase != 0:
-        log_parts.append(f"+ Desfases {format_cop(total_desfase)}")
+        if total_desfase != 0:
+            log_parts.append(f"+ Desfases {dif_efectivo['total_desfase_formatted']}")
 
-    log_parts.append(f"= {format_cop(suma_efectivo_ajustada)} vs Consignar {format_cop(efectivo_para_consignar)}")
-    log_parts.append(f"(diff: {format_cop(diff_efectivo)}) {'✓' if efectivo_validado else '✗'}")
+        log_parts.append(
+            f"= {dif_efectivo['suma_efectivo_ajustada_formatted']} "
+            f"vs Consignar {dif_efectivo['efectivo_para_consignar_formatted']}"
+        )
+        log_parts.append(f"(diff: {dif_efectivo['diferencia_formatted']}) {'✓' if efectivo_validado else '✗'}")
 
-    logger.info(" ".join(log_parts))
-    logger.info(
-        f"  Transferencias Alegra: {format_cop(transferencia_alegra)} vs "
-        f"Registrado: {format_cop(transferencias_registradas)} (diff: {format_cop(diff_transferencia)})"
-    )
-    logger.info(
-        f"  Datafono Alegra: {format_cop(datafono_alegra)} vs "
-        f"Solo tarjetas: {format_cop(solo_tarjetas)} (diff: {format_cop(diff_datafono)})"
-    )
-    logger.info(
-        f"  Datafono Real (con Addi): {format_cop(datafono_real)}"
-    )
+        logger.info(" ".join(log_parts))
+        logger.info(
+            "  Transferencias Alegra: %s vs Registrado: %s (diff: %s)",
+            fmt_transferencia_alegra,
+            fmt_transferencias_registradas,
+            fmt_diff_t
+        )
+        logger.info(
+            "  Datafono Alegra: %s vs Solo tarjetas: %s (diff: %s)",
+            fmt_datafono_alegra,
+            fmt_solo_tarjetas,
+            fmt_diff_d
+        )
+        logger.info("  Datafono Real (con Addi): %s", diferencias["datafono_real"]["total_formatted"])
 
-    # Imprimir mensajes detallados si hay diferencias
-    if mensajes:
-        logger.info("  DETALLES DE DIFERENCIAS:")
-        for mensaje in mensajes:
-            logger.info(f"    {mensaje}")
+        # Imprimir mensajes detallados si hay diferencias
+        if mensajes:
+            logger.info("  DETALLES DE DIFERENCIAS:\n    %s", "\n    ".join(mensajes))
 
     return {
         "cierre_validado": cierre_validado,
@@ -937,11 +1132,12 @@ def preparar_respuesta_completa(
     from app.utils.timezone import get_colombia_timestamp
 
     # Preparar detalle del cálculo del valor a consignar
-    venta_efectivo = cash_result.get("adjustments", {}).get("venta_efectivo_diaria_alegra", 0)
-    gastos_operativos = cash_result.get("adjustments", {}).get("gastos_operativos", 0)
-    prestamos = cash_result.get("adjustments", {}).get("prestamos", 0)
+    adjustments = cash_result.get("adjustments", _EMPTY)
+    venta_efectivo = adjustments.get("venta_efectivo_diaria_alegra", 0)
+    gastos_operativos = adjustments.get("gastos_operativos", 0)
+    prestamos = adjustments.get("prestamos", 0)
     total_desfase = desfases_procesados.get("total_desfase", 0) if desfases_procesados else 0
-    valor_consignar = cash_result.get("consignar", {}).get("efectivo_para_consignar_final", 0)
+    valor_consignar = cash_result.get("consignar", _EMPTY).get("efectivo_para_consignar_final", 0)
 
     detalle_consignacion = {
         "venta_efectivo": venta_efectivo,
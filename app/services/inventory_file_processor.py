@@ -3,8 +3,10 @@ Servicio para procesar archivos de inventario de Alegra
 """
 import csv
 import io
-from typing import Dict, List, Any, BinaryIO
-from decimal import Decimal
+import re
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+from typing import Dict, Iterable, Any, BinaryIO, Optional
 import openpyxl
 
 
@@ -24,6 +26,40 @@ class InventoryFileProcessor:
         ]
     }
 
+    # Una regex compilada por departamento (alternancia de sus palabras clave), en el
+    # mismo orden de prioridad; conserva la búsqueda por subcadena del `in` original
+    DEPARTMENT_REGEXES = {
+        dept: re.compile('|'.join(map(re.escape, keywords)))
+        for dept, keywords in DEPARTMENT_KEYWORDS.items()
+    }
+
+    # Departamentos en orden de clasificación, más 'otros' para lo no clasificado
+    _DEPT_NAMES = (*DEPARTMENT_KEYWORDS, 'otros')
+
+    # Nombres de columna aceptados por campo, en orden de preferencia
+    EXPORT_COLUMNS = {
+        'tipo': ('Tipo', 'tipo'),
+        'nombre': ('Nombre', 'nombre'),
+        'categoria': ('Categoría', 'Categoria', 'categoria'),
+        'estado': ('Estado', 'estado'),
+        'costo': ('Costo inicial', 'costo_inicial', 'costo'),
+        'precio': ('Precio base', 'precio_base', 'precio')
+    }
+    INVENTORY_COLUMNS = {
+        'categoria': ('Categoría', 'Categoria', 'categoria'),
+        'nombre': ('Ítem', 'Item', 'item', 'nombre'),
+        'estado': ('Estado', 'estado'),
+        'cantidad': ('Cantidad', 'cantidad'),
+        'costo': ('Costo promedio', 'costo_promedio', 'costo'),
+        'total': ('Total', 'total')
+    }
+
+    # Tipos de la exportación que corresponden a productos inventariables
+    _INVENTORY_TYPES = frozenset({'Producto', 'Variante', 'producto', 'variante'})
+
+    # Caracteres que se descartan de los valores numéricos (comillas y '=' de Excel)
+    _STRIP_CHARS = str.maketrans('', '', '"=')
+
     @staticmethod
     def detect_separator(content: str) -> str:
         """
@@ -35,7 +71,8 @@ class InventoryFileProcessor:
         Returns:
             str: Separador detectado (, o ;)
         """
-        first_lines = content.split('\n')[:5]
+        # Solo las primeras 5 líneas, sin partir todo el archivo
+        first_lines = list(islice(io.StringIO(content), 5))
 
         # Revisar si hay indicador de separador
         if first_lines and '?sep=' in first_lines[0]:
@@ -56,14 +93,13 @@ class InventoryFileProcessor:
             value: String a convertir
 
         Returns:
-            Decimal: Valor convertido
+            Decimal: Valor convertido (exacto, para no acumular error de redondeo en los totales)
         """
-        if not value or not value.strip():
+        # Remover comillas, signos igual y espacios
+        value = value.translate(InventoryFileProcessor._STRIP_CHARS).strip()
+        if not value:
             return Decimal('0')
 
-        # Remover comillas y espacios
-        value = value.strip().replace('"', '').replace('=', '')
-
         # Manejar formato europeo (coma decimal)
         if ',' in value and '.' not in value:
             value = value.replace(',', '.')
@@ -73,7 +109,7 @@ class InventoryFileProcessor:
 
         try:
             return Decimal(value)
-        except:
+        except InvalidOperation:
             return Decimal('0')
 
     @staticmethod
@@ -91,8 +127,8 @@ class InventoryFileProcessor:
         text = f"{category} {name}".upper()
 
         # Revisar cada departamento
-        for dept, keywords in InventoryFileProcessor.DEPARTMENT_KEYWORDS.items():
-            if any(keyword in text for keyword in keywords):
+        for dept, regex in InventoryFileProcessor.DEPARTMENT_REGEXES.items():
+            if regex.search(text):
                 return dept
 
         return 'otros'
@@ -116,20 +152,21 @@ class InventoryFileProcessor:
             # Detectar separador
             separator = InventoryFileProcessor.detect_separator(content)
 
-            # Parsear CSV
-            lines = content.split('\n')
+            # Parsear CSV directamente sobre el contenido, sin partirlo en líneas
+            stream = io.StringIO(content, newline='')
 
             # Saltar la primera línea si es indicador de separador
-            start_line = 1 if lines and '?sep=' in lines[0] else 0
+            if '?sep=' not in stream.readline():
+                stream.seek(0)
 
             # Crear lector CSV
             csv_reader = csv.DictReader(
-                lines[start_line:],
+                stream,
                 delimiter=separator
             )
 
-            # Procesar filas
-            return InventoryFileProcessor._process_rows(list(csv_reader))
+            # Procesar filas a medida que se leen
+            return InventoryFileProcessor._process_rows(csv_reader)
 
         except Exception as e:
             raise ValueError(f"Error procesando archivo CSV: {str(e)}")
@@ -146,41 +183,44 @@ class InventoryFileProcessor:
             Dict con el análisis del inventario
         """
         try:
-            # Cargar workbook
-            wb = openpyxl.load_workbook(io.BytesIO(file_content))
+            # Cargar workbook en modo solo lectura (sin estilos ni objetos Cell)
+            wb = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
             sheet = wb.active
 
             # Obtener headers (primera fila)
-            headers = [cell.value for cell in sheet[1]]
+            headers = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
 
-            # Convertir a lista de diccionarios
-            rows = []
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                row_dict = dict(zip(headers, row))
-                rows.append(row_dict)
+            # Convertir cada fila a diccionario a medida que se procesa
+            rows = (
+                dict(zip(headers, row))
+                for row in sheet.iter_rows(min_row=2, values_only=True)
+            )
 
             # Procesar filas
-            return InventoryFileProcessor._process_rows(rows)
+            try:
+                return InventoryFileProcessor._process_rows(rows)
+            finally:
+                wb.close()
 
         except Exception as e:
             raise ValueError(f"Error procesando archivo Excel: {str(e)}")
 
     @staticmethod
-    def _detect_file_structure(rows: List[Dict[str, Any]]) -> str:
+    def _detect_file_structure(first_row: Optional[Dict[str, Any]]) -> str:
         """
         Detecta qué estructura tiene el archivo de inventario
 
         Args:
-            rows: Lista de diccionarios con los datos
+            first_row: Primera fila de datos (None si el archivo no tiene filas)
 
         Returns:
             str: 'alegra_export' para exportación de Alegra o 'alegra_inventory' para inventario de Alegra
         """
-        if not rows:
+        if not first_row:
             return 'alegra_export'
 
         # Verificar columnas de la primera fila
-        first_row_keys = set(rows[0].keys())
+        first_row_keys = set(first_row.keys())
 
         # Columnas características de inventario de Alegra
         inventory_columns = {'Ítem', 'Item', 'Cantidad', 'Estado', 'Costo promedio', 'Total'}
@@ -199,44 +239,65 @@ class InventoryFileProcessor:
             return 'alegra_export'
 
     @staticmethod
-    def _process_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _resolve_columns(headers: Iterable[Any], candidates: Dict[str, tuple]) -> Dict[str, str]:
+        """
+        Resuelve una sola vez qué columna del archivo corresponde a cada campo
+
+        Args:
+            headers: Nombres de columna del archivo
+            candidates: Dict {campo: nombres aceptados en orden de preferencia}
+
+        Returns:
+            Dict {campo: nombre de columna}; si ninguna existe se usa el último
+            nombre aceptado, que al no estar en las filas devuelve el valor por defecto
+        """
+        headers = set(headers)
+        return {
+            field: next((name for name in names if name in headers), names[-1])
+            for field, names in candidates.items()
+        }
+
+    @staticmethod
+    def _process_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Procesa las filas del inventario y genera el análisis
 
         Args:
-            rows: Lista de diccionarios con los datos de cada producto
+            rows: Iterable de diccionarios con los datos de cada producto (se consume una vez)
 
         Returns:
             Dict con el análisis completo del inventario
         """
-        # Detectar estructura del archivo
-        file_structure = InventoryFileProcessor._detect_file_structure(rows)
+        # Detectar estructura del archivo a partir de la primera fila, sin materializar el resto
+        rows = iter(rows)
+        first_row = next(rows, None)
+        file_structure = InventoryFileProcessor._detect_file_structure(first_row)
+        headers = first_row.keys() if first_row is not None else ()
+        if first_row is not None:
+            rows = chain((first_row,), rows)
 
         # Procesar según la estructura
         if file_structure == 'alegra_inventory':
-            return InventoryFileProcessor._process_inventory_rows(rows)
+            return InventoryFileProcessor._process_inventory_rows(rows, headers)
         else:
-            return InventoryFileProcessor._process_export_rows(rows)
+            return InventoryFileProcessor._process_export_rows(rows, headers)
 
     @staticmethod
-    def _process_export_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _process_export_rows(rows: Iterable[Dict[str, Any]], headers: Iterable[Any] = ()) -> Dict[str, Any]:
         """
         Procesa filas de exportación de productos de Alegra (estructura antigua)
 
         Args:
-            rows: Lista de diccionarios con los datos de cada producto
+            rows: Iterable de diccionarios con los datos de cada producto
+            headers: Nombres de columna del archivo (claves de las filas)
 
         Returns:
             Dict con el análisis completo del inventario
         """
         # Inicializar contadores por departamento
         departments = {
-            'hombre': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0},
-            'mujer': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0},
-            'nino': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0},
-            'nina': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0},
-            'accesorios': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0},
-            'otros': {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0}
+            name: {'items': [], 'total_cost': Decimal('0'), 'total_price': Decimal('0'), 'quantity': 0}
+            for name in InventoryFileProcessor._DEPT_NAMES
         }
 
         # Contadores generales
@@ -245,55 +306,61 @@ class InventoryFileProcessor:
         total_price_value = Decimal('0')
         categories_count = {}
 
-        # Lista completa de items para enviar al frontend
-        all_items = []
+        parse_decimal = InventoryFileProcessor.parse_decimal
+        classify_department = InventoryFileProcessor.classify_department
+
+        # Columnas resueltas una sola vez a partir de los encabezados
+        columns = InventoryFileProcessor._resolve_columns(headers, InventoryFileProcessor.EXPORT_COLUMNS)
+        col_tipo, col_nombre, col_categoria = columns['tipo'], columns['nombre'], columns['categoria']
+        col_estado, col_costo, col_precio = columns['estado'], columns['costo'], columns['precio']
+        inventory_types = InventoryFileProcessor._INVENTORY_TYPES
 
         # Procesar cada fila
         for row in rows:
             # Obtener valores (manejar diferentes nombres de columnas)
-            tipo = row.get('Tipo', row.get('tipo', ''))
-            nombre = row.get('Nombre', row.get('nombre', ''))
-            categoria = row.get('Categoría', row.get('Categoria', row.get('categoria', '')))
+            tipo = row.get(col_tipo, '')
+            nombre = row.get(col_nombre, '')
+            categoria = row.get(col_categoria, '')
 
             # Descartar productos con asterisco en el nombre
             if nombre and '*' in str(nombre):
                 continue
 
             # Descartar productos con estado Inactivo (si existe el campo)
-            estado = row.get('Estado', row.get('estado', ''))
+            estado = row.get(col_estado, '')
             if estado and str(estado).lower() == 'inactivo':
                 continue
 
             # Solo procesar productos y variantes inventariables
-            if tipo not in ['Producto', 'Variante', 'producto', 'variante']:
+            if tipo not in inventory_types:
                 continue
 
             # Obtener valores numéricos
-            costo_str = row.get('Costo inicial', row.get('costo_inicial', row.get('costo', '0')))
-            precio_str = row.get('Precio base', row.get('precio_base', row.get('precio', '0')))
+            costo_str = row.get(col_costo, '0')
+            precio_str = row.get(col_precio, '0')
 
-            costo = InventoryFileProcessor.parse_decimal(str(costo_str))
-            precio = InventoryFileProcessor.parse_decimal(str(precio_str))
+            costo = parse_decimal(str(costo_str))
+            precio = parse_decimal(str(precio_str))
 
             # Clasificar departamento
-            department = InventoryFileProcessor.classify_department(categoria or '', nombre or '')
-
-            # Crear item
-            item = {
-                'nombre': nombre,
-                'categoria': categoria,
-                'tipo': tipo,
-                'costo': float(costo),
-                'precio': float(precio),
-                'margen': float(precio - costo) if precio > 0 else 0,
-                'margen_porcentaje': float((precio - costo) / precio * 100) if precio > 0 else 0
-            }
+            dept_data = departments[classify_department(categoria or '', nombre or '')]
+
+            # Solo se arman los items de la muestra (primeros 10 por departamento)
+            if len(dept_data['items']) < 10:
+                dept_data['items'].append({
+                    'nombre': nombre,
+                    'categoria': categoria,
+                    'tipo': tipo,
+                    'costo': float(costo),
+                    'precio': float(precio),
+                    'margen': float(precio - costo) if precio > 0 else 0,
+                    'margen_porcentaje': float((precio - costo) / precio * 100) if precio > 0 else 0
+                })
 
             # Agregar a departamento
-            departments[department]['items'].append(item)
-            departments[department]['total_cost'] += costo
-            departments[department]['total_price'] += precio
-            departments[department]['quantity'] += 1
+            dept_data['total_cost'] += costo
+            dept_data['total_price'] += precio
+            dept_data['quantity'] += 1
 
             # Actualizar contadores generales
             total_items += 1
@@ -319,7 +386,7 @@ class InventoryFileProcessor:
                     'precio_promedio': float(dept_data['total_price'] / dept_data['quantity']),
                     'costo_promedio': float(dept_data['total_cost'] / dept_data['quantity']),
                     'porcentaje_inventario': float(dept_data['quantity'] / total_items * 100) if total_items > 0 else 0,
-                    'items': dept_data['items'][:10]  # Solo primeros 10 items como muestra
+                    'items': dept_data['items']  # Solo primeros 10 items como muestra
                 }
 
         # Top categorías
@@ -359,7 +426,7 @@ class InventoryFileProcessor:
         }
 
     @staticmethod
-    def _process_inventory_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _process_inventory_rows(rows: Iterable[Dict[str, Any]], headers: Iterable[Any] = ()) -> Dict[str, Any]:
         """
         Procesa filas de inventario de Alegra (estructura nueva)
 
@@ -372,19 +439,19 @@ class InventoryFileProcessor:
         - Total (Cantidad × Costo promedio)
 
         Args:
-            rows: Lista de diccionarios con los datos de inventario
+            rows: Iterable de diccionarios con los datos de inventario
+            headers: Nombres de columna del archivo (claves de las filas)
 
         Returns:
             Dict con el análisis completo del inventario
         """
         # Inicializar contadores por departamento
         departments = {
-            'hombre': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0},
-            'mujer': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0},
-            'nino': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0},
-            'nina': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0},
-            'accesorios': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0},
-            'otros': {'items': [], 'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0}
+            name: {
+                'items': [], 'item_count': 0,
+                'total_cost': Decimal('0'), 'total_value': Decimal('0'), 'quantity': 0
+            }
+            for name in InventoryFileProcessor._DEPT_NAMES
         }
 
         # Contadores generales
@@ -399,12 +466,20 @@ class InventoryFileProcessor:
         # Lista completa de items para enviar al frontend
         all_items = []
 
+        parse_decimal = InventoryFileProcessor.parse_decimal
+        classify_department = InventoryFileProcessor.classify_department
+
+        # Columnas resueltas una sola vez a partir de los encabezados
+        columns = InventoryFileProcessor._resolve_columns(headers, InventoryFileProcessor.INVENTORY_COLUMNS)
+        col_categoria, col_nombre, col_estado = columns['categoria'], columns['nombre'], columns['estado']
+        col_cantidad, col_costo, col_total = columns['cantidad'], columns['costo'], columns['total']
+
         # Procesar cada fila
         for row in rows:
             # Obtener valores (maneja diferentes nombres de columnas)
-            categoria = row.get('Categoría', row.get('Categoria', row.get('categoria', '')))
-            nombre = row.get('Ítem', row.get('Item', row.get('item', row.get('nombre', ''))))
-            estado = row.get('Estado', row.get('estado', ''))
+            categoria = row.get(col_categoria, '')
+            nombre = row.get(col_nombre, '')
+            estado = row.get(col_estado, '')
 
             # Descartar productos con asterisco en el nombre
             if nombre and '*' in str(nombre):
@@ -415,25 +490,27 @@ class InventoryFileProcessor:
                 continue
 
             # Obtener valores numéricos
-            cantidad = int(row.get('Cantidad', row.get('cantidad', 0)) or 0)
-            costo_str = row.get('Costo promedio', row.get('costo_promedio', row.get('costo', '0')))
-            total_str = row.get('Total', row.get('total', '0'))
+            cantidad = int(row.get(col_cantidad, 0) or 0)
+            costo_str = row.get(col_costo, '0')
+            total_str = row.get(col_total, '0')
 
-            costo = InventoryFileProcessor.parse_decimal(str(costo_str))
-            total = InventoryFileProcessor.parse_decimal(str(total_str))
+            costo = parse_decimal(str(costo_str))
+            total = parse_decimal(str(total_str))
 
             # Clasificar departamento
-            department = InventoryFileProcessor.classify_department(categoria or '', nombre or '')
-
-            # Crear item
-            item = {
-                'nombre': nombre,
-                'categoria': categoria,
-                'cantidad': cantidad,
-                'estado': estado,
-                'costo_unitario': float(costo),
-                'valor_total': float(total)
-            }
+            dept_data = departments[classify_department(categoria or '', nombre or '')]
+
+            # Solo se arman los items de la muestra (primeros 10 por departamento)
+            dept_data['item_count'] += 1
+            if dept_data['item_count'] <= 10:
+                dept_data['items'].append({
+                    'nombre': nombre,
+                    'categoria': categoria,
+                    'cantidad': cantidad,
+                    'estado': estado,
+                    'costo_unitario': float(costo),
+                    'valor_total': float(total)
+                })
 
             # Agregar item simplificado a la lista completa (solo campos necesarios para frontend)
             all_items.append({
@@ -449,10 +526,9 @@ class InventoryFileProcessor:
             has_stock = cantidad > 0
 
             # Agregar a departamento
-            departments[department]['items'].append(item)
-            departments[department]['total_cost'] += costo * cantidad  # Costo total del inventario
-            departments[department]['total_value'] += total
-            departments[department]['quantity'] += cantidad
+            dept_data['total_cost'] += costo * cantidad  # Costo total del inventario
+            dept_data['total_value'] += total
+            dept_data['quantity'] += cantidad
 
             # Actualizar contadores generales
             total_items += 1
@@ -474,9 +550,8 @@ class InventoryFileProcessor:
         departments_summary = {}
         for dept_name, dept_data in departments.items():
             if dept_data['quantity'] > 0:
-                item_count = len(dept_data['items'])
                 departments_summary[dept_name] = {
-                    'cantidad_items': item_count,
+                    'cantidad_items': dept_data['item_count'],
                     'cantidad_unidades': dept_data['quantity'],
                     'valor_inventario': float(dept_data['total_value']),
                     'costo_total': float(dept_data['total_cost']),
@@ -484,7 +559,7 @@ class InventoryFileProcessor:
                     'valor_promedio': float(dept_data['total_value'] / dept_data['quantity']) if dept_data['quantity'] > 0 else 0,
                     'porcentaje_unidades': float(dept_data['quantity'] / total_quantity * 100) if total_quantity > 0 else 0,
                     'porcentaje_valor': float(dept_data['total_value'] / total_inventory_value * 100) if total_inventory_value > 0 else 0,
-                    'items': dept_data['items'][:10]  # Solo primeros 10 items como muestra
+                    'items': dept_data['items']  # Solo primeros 10 items como muestra
                 }
 
         # Top categorías
@@ -2,13 +2,49 @@
 Servicio para manejo de JWT tokens
 """
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
 from flask import current_app
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def setup_jwt_config(app) -> None:
+    """
+    Resuelve la configuración JWT de la app al crearla
+
+    La tupla queda fija en app.extensions['jwt_service']: cambios posteriores
+    a app.config no afectan la emisión ni la validación de tokens.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.extensions['jwt_service'] = (
+        app.config.get('JWT_SECRET_KEY'),
+        app.config.get('JWT_ALGORITHM', 'HS256'),
+        app.config.get('JWT_EXPIRATION_HOURS', 8)
+    )
+
+
+def _jwt_config() -> Tuple[str, str, int]:
+    """
+    Obtiene la configuración JWT de la app actual
+
+    Returns:
+        Tupla (secret_key, algorithm, expiration_hours)
+    """
+    config = current_app.extensions.get('jwt_service')
+    if config is None:
+        # App creada sin create_app: se lee la configuración en cada llamada
+        return (
+            current_app.config.get('JWT_SECRET_KEY'),
+            current_app.config.get('JWT_ALGORITHM', 'HS256'),
+            current_app.config.get('JWT_EXPIRATION_HOURS', 8)
+        )
+    return config
+
+
 class JWTService:
     """Servicio para generar y validar tokens JWT"""
 
@@ -26,16 +62,15 @@ class JWTService:
             Token JWT como string
         """
         try:
-            expiration_hours = current_app.config.get('JWT_EXPIRATION_HOURS', 8)
-            secret_key = current_app.config.get('JWT_SECRET_KEY')
-            algorithm = current_app.config.get('JWT_ALGORITHM', 'HS256')
+            secret_key, algorithm, expiration_hours = _jwt_config()
 
+            ahora = datetime.now(timezone.utc)
             payload = {
                 'userId': user_id,
                 'email': email,
                 'role': role,
-                'iat': datetime.utcnow(),
-                'exp': datetime.utcnow() + timedelta(hours=expiration_hours)
+                'iat': ahora,
+                'exp': ahora + timedelta(hours=expiration_hours)
             }
 
             token = jwt.encode(payload, secret_key, algorithm=algorithm)
@@ -63,8 +98,7 @@ class JWTService:
             jwt.InvalidTokenError: Si el token es inválido
         """
         try:
-            secret_key = current_app.config.get('JWT_SECRET_KEY')
-            algorithm = current_app.config.get('JWT_ALGORITHM', 'HS256')
+            secret_key, algorithm, _ = _jwt_config()
 
             payload = jwt.decode(token, secret_key, algorithms=[algorithm])
 
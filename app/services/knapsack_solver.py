@@ -2,7 +2,8 @@
 Servicio de resolución de problemas Knapsack
 Algoritmo de programación dinámica para calcular la base exacta de caja
 """
-from typing import Dict, Tuple
+from math import gcd
+from typing import Dict, Mapping, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,13 +59,13 @@ class KnapsackSolver:
 
     def resolver(
         self,
-        todas_denoms: Dict[int, int]
+        todas_denoms: Mapping[int, int]
     ) -> Tuple[Dict[int, int], Dict[int, int], int, bool]:
         """
         Resuelve el problema de knapsack para encontrar la combinación exacta
 
         Args:
-            todas_denoms: Diccionario {denominación: cantidad_disponible}
+            todas_denoms: Mapping {denominación: cantidad_disponible} (dict o ChainMap)
 
         Returns:
             Tupla con:
@@ -79,15 +80,23 @@ class KnapsackSolver:
             - Maximiza denominaciones pequeñas (menudo) en la base
             - Busca combinación exacta del objetivo
         """
-        MAX = self.objetivo
         NEG = self.NEG
 
-        # Tabla DP: dp[s] = máximo aporte de menudo al llegar a suma s
-        dp = [NEG] * (MAX + 1)
-        dp[0] = 0
-
-        # prev[s] guarda el estado previo para reconstruir la solución
-        prev = [None] * (MAX + 1)
+        # Si el efectivo disponible no supera el objetivo, la única forma de acercarse
+        # al máximo es usarlo todo: se evita armar y recorrer la tabla DP
+        total_disponible = sum(denom * cnt for denom, cnt in todas_denoms.items() if cnt > 0)
+        if total_disponible <= self.objetivo:
+            restante = self.objetivo - total_disponible
+            if restante and logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "⚠ Base inexacta: $%s de $%s (falta $%s)",
+                    format(total_disponible, ','),
+                    format(self.objetivo, ','),
+                    format(restante, ',')
+                )
+            conteo_base = {d: c if c > 0 else 0 for d, c in todas_denoms.items()}
+            conteo_consignar = {d: todas_denoms[d] - conteo_base[d] for d in todas_denoms}
+            return conteo_base, conteo_consignar, restante, restante == 0
 
         # Preparar items con descomposición binaria
         items = []
@@ -102,22 +111,52 @@ class KnapsackSolver:
                 aporte_menudo = valor_total if denom <= self.umbral_menudo else 0
                 items.append((valor_total, aporte_menudo, denom, k))
 
-        logger.debug(f"Items preparados: {len(items)} después de descomposición binaria")
+        logger.debug("Items preparados: %d después de descomposición binaria", len(items))
+
+        # Todas las sumas alcanzables son múltiplos del MCD de las denominaciones
+        # disponibles (50 con las denominaciones colombianas), así que la tabla DP
+        # se indexa en esas unidades: mismas decisiones, tabla y barrido PASO veces
+        # más cortos
+        paso = gcd(*(valor_total for valor_total, _, _, _ in items)) or 1
+        MAX = self.objetivo // paso
+        items = [
+            (valor_total // paso, aporte_menudo, denom, k)
+            for valor_total, aporte_menudo, denom, k in items
+        ]
+
+        # Tabla DP: dp[s] = máximo aporte de menudo al llegar a suma s * paso
+        dp = [NEG] * (MAX + 1)
+        dp[0] = 0
+
+        # tomado[idx][s] = 1 si el item idx mejoró dp[s] al procesarlo. Una marca por
+        # item (y no solo el último item por suma) permite reconstruir la cadena con
+        # items anteriores al que se tomó, sin usar un item dos veces
+        tomado = []
+
+        # Máxima suma alcanzable con los items procesados hasta ahora: por encima de
+        # ella dp[s - valor] es siempre NEG, así que el barrido no necesita llegar
+        alcanzable = 0
 
         # DP: Procesar cada item
-        for valor_total, aporte_menudo, denom, k in items:
+        for valor, aporte_menudo, _, _ in items:
+            marca = bytearray(MAX + 1)
+            tomado.append(marca)
+            alcanzable = min(MAX, alcanzable + valor)
             # Recorrer de atrás hacia adelante para evitar usar el mismo item múltiples veces
-            for s in range(MAX, valor_total - 1, -1):
-                if dp[s - valor_total] != NEG:
-                    cand = dp[s - valor_total] + aporte_menudo
+            for s in range(alcanzable, valor - 1, -1):
+                # Un solo acceso a la tabla por estado origen
+                origen = dp[s - valor]
+                if origen != NEG:
+                    cand = origen + aporte_menudo
                     if cand > dp[s]:
                         dp[s] = cand
-                        prev[s] = (s - valor_total, denom, k)
+                        marca[s] = 1
 
         # Caso 1: Se alcanzó el objetivo exacto
-        if dp[MAX] != NEG:
-            logger.info(f"✓ Base exacta alcanzada: ${MAX:,}")
-            usado = self._reconstruir_solucion(prev, MAX)
+        if MAX * paso == self.objetivo and dp[MAX] != NEG:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✓ Base exacta alcanzada: $%s", format(self.objetivo, ','))
+            usado = self._reconstruir_solucion(tomado, items, MAX)
             conteo_base = {d: usado.get(d, 0) for d in todas_denoms}
             conteo_consignar = {d: todas_denoms[d] - conteo_base[d] for d in todas_denoms}
             return conteo_base, conteo_consignar, 0, True
@@ -138,21 +177,33 @@ class KnapsackSolver:
             return conteo_base, conteo_consignar, restante, False
 
         # Reconstruir la mejor solución parcial
-        logger.warning(f"⚠ Base inexacta: ${mejor_s:,} de ${MAX:,} (falta ${MAX - mejor_s:,})")
-        usado = self._reconstruir_solucion(prev, mejor_s)
+        mejor_monto = mejor_s * paso
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                "⚠ Base inexacta: $%s de $%s (falta $%s)",
+                format(mejor_monto, ','),
+                format(self.objetivo, ','),
+                format(self.objetivo - mejor_monto, ',')
+            )
+        usado = self._reconstruir_solucion(tomado, items, mejor_s)
         conteo_base = {d: usado.get(d, 0) for d in todas_denoms}
         conteo_consignar = {d: todas_denoms[d] - conteo_base[d] for d in todas_denoms}
-        restante = self.objetivo - mejor_s
+        restante = self.objetivo - mejor_monto
 
         return conteo_base, conteo_consignar, restante, False
 
-    def _reconstruir_solucion(self, prev: list, suma_final: int) -> Dict[int, int]:
+    def _reconstruir_solucion(self, tomado: list, items: list, suma_final: int) -> Dict[int, int]:
         """
         Reconstruye la solución desde la tabla de backtracking
 
+        Recorre los items del último al primero: si el item mejoró la suma actual,
+        se toma y se sigue desde la suma previa solo con los items anteriores, así
+        que cada item se usa a lo sumo una vez
+
         Args:
-            prev: Tabla de backtracking
-            suma_final: Suma final alcanzada
+            tomado: Marcas por item de las sumas que mejoró durante la DP
+            items: Items (valor, aporte_menudo, denominación, k) usados en la DP
+            suma_final: Suma final alcanzada (en unidades de la tabla DP)
 
         Returns:
             Dict {denominación: cantidad_usada}
@@ -160,20 +211,19 @@ class KnapsackSolver:
         usado = {}
         s = suma_final
 
-        while s > 0:
-            entry = prev[s]
-            if entry is None:
+        for idx in range(len(items) - 1, -1, -1):
+            if s <= 0:
                 break
-
-            s_prev, denom, k = entry
-            usado[denom] = usado.get(denom, 0) + k
-            s = s_prev
+            if tomado[idx][s]:
+                valor, _, denom, k = items[idx]
+                usado[denom] = usado.get(denom, 0) + k
+                s -= valor
 
         return usado
 
 
 def construir_base_exacta(
-    todas_denoms: Dict[int, int],
+    todas_denoms: Mapping[int, int],
     monto_objetivo: int,
     umbral_menudo: int
 ) -> Tuple[Dict[int, int], Dict[int, int], int, bool]:
@@ -3,35 +3,132 @@ Servicio de generación de PDFs para reportes de productos
 Genera PDFs con el mismo estilo del reporte original
 """
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 from typing import Dict, List, Any
 import logging
 
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 
 logger = logging.getLogger(__name__)
 
+# Estilos de tabla fijos: se construyen una sola vez y se comparten entre tablas y reportes
+_SUMMARY_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+])
+
+_UNIFIED_SIZE_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+])
+
+
+# Anchos de columna por tipo de tabla, calculados una sola vez
+_COLWIDTHS_SUMMARY = (3.5*inch, 3.5*inch)
+_COLWIDTHS_PRODUCTS = (0.5*inch, 3*inch, 1*inch, 1.3*inch, 1.2*inch)
+_COLWIDTHS_LISTING = (3.5*inch, 1*inch, 1.3*inch, 1.2*inch)
+_COLWIDTHS_SIZE = (1.5*inch, 1.5*inch, 2*inch, 2*inch)
+_COLWIDTHS_CATEGORY_SIZE = (1*inch, 1.5*inch, 2*inch, 1.5*inch)
+
+
+# Alto de una fila de una sola línea: leading por defecto de la celda (12) más el
+# padding superior e inferior (3 + 3); es lo que la tabla calcularía al medirla
+_ROW_HEIGHT = 18
+
+
+def _row_heights(data: List[List[Any]]) -> List[Any]:
+    """
+    Altos de fila fijos para que la tabla no tenga que medir cada celda
+
+    Args:
+        data: Filas de la tabla
+
+    Returns:
+        Lista con _ROW_HEIGHT por fila, o None (alto automático) en las filas
+        con algún texto de varias líneas
+    """
+    return [
+        None if any(isinstance(cell, str) and '\n' in cell for cell in row) else _ROW_HEIGHT
+        for row in data
+    ]
+
+
+# Títulos de departamento con su emoji, armados una sola vez; los departamentos
+# que no están aquí usan '📦'
+_DEPT_LABELS = {
+    name: f'<b>{emoji} {name}</b>'
+    for name, emoji in (
+        ('MUJER', '👗'),
+        ('HOMBRE', '👔'),
+        ('NIÑOS', '🧒'),
+        ('ACCESORIOS', '👜'),
+        ('UNKNOWN', '❓'),
+        ('OTROS', '📦'),
+    )
+}
+
+
+@lru_cache(maxsize=None)
+def _header_total_table_style(header_color, font_size: int) -> TableStyle:
+    """
+    Estilo de las tablas con encabezado de color y fila TOTAL, cacheado por combinación
+
+    Args:
+        header_color: Color de fondo del encabezado
+        font_size: Tamaño de fuente de la tabla
+
+    Returns:
+        TableStyle compartido para esa combinación
+    """
+    return TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+    ])
+
+
+# Hoja de estilos compartida por todas las instancias: el generador se crea por
+# request y los estilos no se modifican al construir el documento
+_STYLES = getSampleStyleSheet()
+_NORMAL_STYLE = ParagraphStyle(
+    name='Justify',
+    parent=_STYLES['BodyText'],
+    alignment=1  # Centrado
+)
+
 
 class ProductReportPDFGenerator:
     """Genera PDFs de reportes de productos con estilo profesional"""
 
     def __init__(self):
-        self.styles = getSampleStyleSheet()
+        self.styles = _STYLES
         self._setup_custom_styles()
 
     def _setup_custom_styles(self):
         """Configura estilos personalizados para el PDF"""
         self.h1_style = self.styles['Heading1']
         self.h2_style = self.styles['Heading2']
-        self.normal_style = ParagraphStyle(
-            name='Justify',
-            parent=self.styles['BodyText'],
-            alignment=1  # Centrado
-        )
+        self.normal_style = _NORMAL_STYLE
 
     def generate_report(self, analytics_data: Dict[str, Any], date_range: str = None) -> BytesIO:
         """
@@ -51,7 +148,8 @@ class ProductReportPDFGenerator:
             leftMargin=30,
             rightMargin=30,
             topMargin=40,
-            bottomMargin=40
+            bottomMargin=40,
+            pageCompression=1  # Explícito: no depender de rl_config / rl_local_settings
         )
 
         elementos = []
@@ -132,15 +230,8 @@ class ProductReportPDFGenerator:
             ['Unidades del producto más vendido', summary['unidades_mas_vendido_formatted']]
         ]
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[3.5*inch, 3.5*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ]))
+        tabla = Table(data, hAlign='CENTER', colWidths=_COLWIDTHS_SUMMARY)
+        tabla.setStyle(_SUMMARY_TABLE_STYLE)
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -155,7 +246,8 @@ class ProductReportPDFGenerator:
         # Header
         data = [['#', 'Producto', 'Cantidad', 'Ingresos', '% de participación']]
 
-        # Productos
+        # Productos y totales en una sola pasada
+        total_cantidad = total_ingresos = total_pct = 0
         for product in products:
             data.append([
                 product['ranking'],
@@ -164,11 +256,9 @@ class ProductReportPDFGenerator:
                 product['ingresos_formatted'],
                 product['porcentaje_participacion_formatted']
             ])
-
-        # Totales
-        total_cantidad = sum(p['cantidad'] for p in products)
-        total_ingresos = sum(p['ingresos'] for p in products)
-        total_pct = sum(p['porcentaje_participacion'] for p in products)
+            total_cantidad += product['cantidad']
+            total_ingresos += product['ingresos']
+            total_pct += product['porcentaje_participacion']
 
         data.append([
             'TOTAL',
@@ -178,17 +268,8 @@ class ProductReportPDFGenerator:
             ProductReportPDFGenerator._format_percentage(total_pct)
         ])
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[0.5*inch, 3*inch, 1*inch, 1.3*inch, 1.2*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ]))
+        tabla = Table(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_PRODUCTS)
+        tabla.setStyle(_header_total_table_style(header_color, 9))
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -203,7 +284,8 @@ class ProductReportPDFGenerator:
         # Header
         data = [['#', 'Producto', 'Cantidad', 'Ingresos', '% de participación']]
 
-        # Productos
+        # Productos y totales en una sola pasada
+        total_cantidad = total_ingresos = total_pct = 0
         for product in products:
             data.append([
                 product['ranking'],
@@ -212,11 +294,9 @@ class ProductReportPDFGenerator:
                 product['ingresos_formatted'],
                 product['porcentaje_participacion_formatted']
             ])
-
-        # Totales
-        total_cantidad = sum(p['cantidad'] for p in products)
-        total_ingresos = sum(p['ingresos'] for p in products)
-        total_pct = sum(p['porcentaje_participacion'] for p in products)
+            total_cantidad += product['cantidad']
+            total_ingresos += product['ingresos']
+            total_pct += product['porcentaje_participacion']
 
         data.append([
             'TOTAL',
@@ -226,17 +306,8 @@ class ProductReportPDFGenerator:
             ProductReportPDFGenerator._format_percentage(total_pct)
         ])
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[0.5*inch, 3*inch, 1*inch, 1.3*inch, 1.2*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ]))
+        tabla = Table(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_PRODUCTS)
+        tabla.setStyle(_header_total_table_style(header_color, 9))
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -251,17 +322,21 @@ class ProductReportPDFGenerator:
         # Header
         data = [['#', 'Producto', 'Cantidad', 'Ingresos', '% de participación']]
 
-        # Productos (limitar a primeros 50 para que el PDF no sea muy largo)
-        display_products = products[:50] if len(products) > 50 else products
-
-        for product in display_products:
-            data.append([
-                product['ranking'],
-                product['nombre_base'],
-                product['cantidad_formatted'],
-                product['ingresos_formatted'],
-                product['porcentaje_participacion_formatted']
-            ])
+        # Productos (limitar a primeros 50 para que el PDF no sea muy largo) y totales
+        # sobre todos los productos, no solo los mostrados, en una sola pasada
+        total_cantidad = total_ingresos = total_pct = 0
+        for i, product in enumerate(products):
+            if i < 50:
+                data.append([
+                    product['ranking'],
+                    product['nombre_base'],
+                    product['cantidad_formatted'],
+                    product['ingresos_formatted'],
+                    product['porcentaje_participacion_formatted']
+                ])
+            total_cantidad += product['cantidad']
+            total_ingresos += product['ingresos']
+            total_pct += product['porcentaje_participacion']
 
         # Agregar nota si hay más productos
         if len(products) > 50:
@@ -272,11 +347,6 @@ class ProductReportPDFGenerator:
             ))
             elementos.append(Spacer(1, 10))
 
-        # Totales (sobre todos los productos, no solo los mostrados)
-        total_cantidad = sum(p['cantidad'] for p in products)
-        total_ingresos = sum(p['ingresos'] for p in products)
-        total_pct = sum(p['porcentaje_participacion'] for p in products)
-
         data.append([
             'TOTAL',
             '',
@@ -285,17 +355,8 @@ class ProductReportPDFGenerator:
             ProductReportPDFGenerator._format_percentage(total_pct)
         ])
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[0.5*inch, 3*inch, 1*inch, 1.3*inch, 1.2*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ]))
+        tabla = LongTable(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_PRODUCTS)
+        tabla.setStyle(_header_total_table_style(header_color, 8))
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -310,16 +371,20 @@ class ProductReportPDFGenerator:
         # Header
         data = [['Producto', 'Cantidad', 'Ingresos', '% de participación']]
 
-        # Productos (limitar para no hacer el PDF demasiado largo)
-        display_products = products[:100] if len(products) > 100 else products
-
-        for product in display_products:
-            data.append([
-                product['nombre'],
-                product['cantidad_formatted'],
-                product['ingresos_formatted'],
-                product['porcentaje_participacion_formatted']
-            ])
+        # Productos (limitar para no hacer el PDF demasiado largo) y totales sobre
+        # todos los productos en una sola pasada
+        total_cantidad = total_ingresos = total_pct = 0
+        for i, product in enumerate(products):
+            if i < 100:
+                data.append([
+                    product['nombre'],
+                    product['cantidad_formatted'],
+                    product['ingresos_formatted'],
+                    product['porcentaje_participacion_formatted']
+                ])
+            total_cantidad += product['cantidad']
+            total_ingresos += product['ingresos']
+            total_pct += product['porcentaje_participacion']
 
         # Agregar nota si hay más productos
         if len(products) > 100:
@@ -330,11 +395,6 @@ class ProductReportPDFGenerator:
             ))
             elementos.append(Spacer(1, 10))
 
-        # Totales
-        total_cantidad = sum(p['cantidad'] for p in products)
-        total_ingresos = sum(p['ingresos'] for p in products)
-        total_pct = sum(p['porcentaje_participacion'] for p in products)
-
         data.append([
             'TOTAL',
             ProductReportPDFGenerator._format_number(total_cantidad),
@@ -342,17 +402,8 @@ class ProductReportPDFGenerator:
             ProductReportPDFGenerator._format_percentage(total_pct)
         ])
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[3.5*inch, 1*inch, 1.3*inch, 1.2*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ]))
+        tabla = LongTable(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_LISTING)
+        tabla.setStyle(_header_total_table_style(header_color, 8))
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -378,7 +429,8 @@ class ProductReportPDFGenerator:
         # Header
         data = [['Talla', 'Cantidad', 'Ingresos', '% Participación']]
 
-        # Datos de tallas
+        # Datos de tallas y totales en una sola pasada
+        total_cantidad = total_ingresos = total_pct = 0
         for size in size_data:
             data.append([
                 size['size'],
@@ -386,11 +438,9 @@ class ProductReportPDFGenerator:
                 size['revenue_formatted'],
                 size['percentage_formatted']
             ])
-
-        # Totales
-        total_cantidad = sum(s['units'] for s in size_data)
-        total_ingresos = sum(s['revenue'] for s in size_data)
-        total_pct = sum(s['percentage'] for s in size_data)
+            total_cantidad += size['units']
+            total_ingresos += size['revenue']
+            total_pct += size['percentage']
 
         data.append([
             'TOTAL',
@@ -399,17 +449,8 @@ class ProductReportPDFGenerator:
             ProductReportPDFGenerator._format_percentage(total_pct)
         ])
 
-        tabla = Table(data, hAlign='CENTER', colWidths=[1.5*inch, 1.5*inch, 2*inch, 2*inch])
-        tabla.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ]))
+        tabla = Table(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_SIZE)
+        tabla.setStyle(_header_total_table_style(header_color, 9))
 
         elementos.append(tabla)
         elementos.append(Spacer(1, 20))
@@ -447,6 +488,8 @@ class ProductReportPDFGenerator:
             if not isinstance(sizes_list, list):
                 sizes_list = []
 
+            # Filas de tallas y totales de la categoría en una sola pasada
+            total_cantidad = total_ingresos = total_pct = 0
             for size in sizes_list:
                 if not isinstance(size, dict):
                     continue
@@ -456,11 +499,9 @@ class ProductReportPDFGenerator:
                     size.get('revenue_formatted', '$ 0'),
                     size.get('percentage_in_category_formatted', '0%')
                 ])
-
-            # Totales de la categoría
-            total_cantidad = sum(s.get('units', 0) for s in sizes_list if isinstance(s, dict))
-            total_ingresos = sum(s.get('revenue', 0) for s in sizes_list if isinstance(s, dict))
-            total_pct = sum(s.get('percentage_in_category', 0) for s in sizes_list if isinstance(s, dict))
+                total_cantidad += size.get('units', 0)
+                total_ingresos += size.get('revenue', 0)
+                total_pct += size.get('percentage_in_category', 0)
 
             data.append([
                 'TOTAL',
@@ -469,17 +510,8 @@ class ProductReportPDFGenerator:
                 ProductReportPDFGenerator._format_percentage(total_pct)
             ])
 
-            tabla = Table(data, hAlign='CENTER', colWidths=[1.5*inch, 1.5*inch, 2*inch, 2*inch])
-            tabla.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, 0), (-1, 0), header_color),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ]))
+            tabla = Table(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_SIZE)
+            tabla.setStyle(_header_total_table_style(header_color, 9))
 
             elementos.append(tabla)
             elementos.append(Spacer(1, 15))
@@ -513,7 +545,8 @@ class ProductReportPDFGenerator:
             # Header
             data = [['Talla', 'Cantidad', 'Ingresos', '% Participación']]
 
-            # Datos de tallas para este departamento
+            # Datos de tallas para este departamento y sus totales en una sola pasada
+            total_cantidad = total_ingresos = total_pct = 0
             for size in department['sizes']:
                 data.append([
                     size['size'],
@@ -521,11 +554,9 @@ class ProductReportPDFGenerator:
                     size['revenue_formatted'],
                     size['percentage_in_department_formatted']
                 ])
-
-            # Totales del departamento
-            total_cantidad = sum(s['units'] for s in department['sizes'])
-            total_ingresos = sum(s['revenue'] for s in department['sizes'])
-            total_pct = sum(s['percentage_in_department'] for s in department['sizes'])
+                total_cantidad += size['units']
+                total_ingresos += size['revenue']
+                total_pct += size['percentage_in_department']
 
             data.append([
                 'TOTAL',
@@ -534,17 +565,8 @@ class ProductReportPDFGenerator:
                 ProductReportPDFGenerator._format_percentage(total_pct)
             ])
 
-            tabla = Table(data, hAlign='CENTER', colWidths=[1.5*inch, 1.5*inch, 2*inch, 2*inch])
-            tabla.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, 0), (-1, 0), header_color),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ]))
+            tabla = Table(data, rowHeights=_row_heights(data), hAlign='CENTER', colWidths=_COLWIDTHS_SIZE)
+            tabla.setStyle(_header_total_table_style(header_color, 9))
 
             elementos.append(tabla)
             elementos.append(Spacer(1, 15))
@@ -590,27 +612,16 @@ class ProductReportPDFGenerator:
             ))
             return elementos
 
-        # Mapeo de emojis para departamentos
-        dept_emojis = {
-            'MUJER': '👗',
-            'HOMBRE': '👔',
-            'NIÑOS': '🧒',
-            'ACCESORIOS': '👜',
-            'UNKNOWN': '❓',
-            'OTROS': '📦'
-        }
-
         for dept in departments:
             # Validar que dept es un diccionario
             if not isinstance(dept, dict):
                 continue
 
             dept_name = dept.get('department', 'UNKNOWN')
-            emoji = dept_emojis.get(dept_name, '📦')
 
             # Título del departamento
             elementos.append(Paragraph(
-                f'<b>{emoji} {dept_name}</b>',
+                _DEPT_LABELS.get(dept_name) or f'<b>📦 {dept_name}</b>',
                 self.h1_style
             ))
             elementos.append(Paragraph(
@@ -653,7 +664,8 @@ class ProductReportPDFGenerator:
                     # Header
                     data = [['Talla', 'Unidades', 'Ingresos', '% en Categoría']]
 
-                    # Datos de tallas
+                    # Datos de tallas y totales en una sola pasada
+                    total_units = total_revenue = 0
                     for size in sizes:
                         # Validar que size es un diccionario
                         if not isinstance(size, dict):
@@ -665,10 +677,8 @@ class ProductReportPDFGenerator:
                             size.get('revenue_formatted', '$ 0'),
                             size.get('percentage_in_category_formatted', '0%')
                         ])
-
-                    # Totales
-                    total_units = sum(s.get('units', 0) for s in sizes if isinstance(s, dict))
-                    total_revenue = sum(s.get('revenue', 0) for s in sizes if isinstance(s, dict))
+                        total_units += size.get('units', 0)
+                        total_revenue += size.get('revenue', 0)
 
                     data.append([
                         'TOTAL',
@@ -678,17 +688,8 @@ class ProductReportPDFGenerator:
                     ])
 
                     # Crear tabla
-                    tabla = Table(data, hAlign='LEFT', colWidths=[1*inch, 1.5*inch, 2*inch, 1.5*inch])
-                    tabla.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                        ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ]))
+                    tabla = Table(data, rowHeights=_row_heights(data), hAlign='LEFT', colWidths=_COLWIDTHS_CATEGORY_SIZE)
+                    tabla.setStyle(_UNIFIED_SIZE_TABLE_STYLE)
 
                     elementos.append(tabla)
                     elementos.append(Spacer(1, 10))
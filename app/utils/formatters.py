@@ -1,6 +1,7 @@
 """
 Utilidades de formateo
 """
+from functools import lru_cache
 
 
 def safe_int(x):
@@ -50,10 +51,23 @@ def safe_number(amount):
             return 0
 
 
+@lru_cache(maxsize=4096)
+def _format_cop_cached(amount):
+    """Formatea un monto hashable; los resultados se cachean por valor"""
+    try:
+        formatted = f"{int(round(amount, 0)):,}".replace(",", ".")
+        return f"${formatted}"
+    except Exception:
+        return f"${amount}"
+
+
 def format_cop(amount):
     """
     Formatea un número como pesos colombianos
 
+    Los montos se repiten mucho dentro de un mismo cierre (base, totales,
+    logs), por lo que el resultado se cachea por valor.
+
     Args:
         amount: Cantidad a formatear
 
@@ -67,9 +81,9 @@ def format_cop(amount):
         '$1.234.567'
     """
     try:
-        formatted = f"{int(round(amount, 0)):,}".replace(",", ".")
-        return f"${formatted}"
-    except Exception:
+        return _format_cop_cached(amount)
+    except TypeError:
+        # Valores no hashables no pasan por el cache
         return f"${amount}"
 
 
@@ -2,7 +2,7 @@
 Tests para el calculador de caja
 """
 import pytest
-from app.services.cash_calculator import CashCalculator
+from app.services.cash_calculator import CashCalculator, procesar_excedentes
 
 
 class TestCashCalculator:
@@ -108,6 +108,10 @@ class TestCashCalculator:
         assert 'consignar' in resultado
         assert 'adjustments' in resultado
 
+        # Cada campo aparece una sola vez: la consignación no se repite en la base
+        assert not any(k.startswith('consignar') for k in resultado['base'])
+        assert 'consignar_monedas' in resultado['consignar']
+
         # Verificar totales
         assert resultado['totals']['total_general'] > 0
         assert resultado['base']['total_base'] <= 450000
@@ -115,3 +119,78 @@ class TestCashCalculator:
         # Verificar campos formateados
         assert resultado['totals']['total_general_formatted'].startswith('$')
         assert resultado['base']['total_base_formatted'].startswith('$')
+
+    def test_calcular_base_repetido_usa_cache(self):
+        """Test que un conteo repetido reutiliza el resultado del knapsack"""
+        from app.services.cash_calculator import _construir_base_cacheada
+
+        calculator = CashCalculator(base_objetivo=50000, umbral_menudo=10000)
+        conteo_monedas = {50: 0, 100: 6, 200: 40, 500: 1, 1000: 0}
+        conteo_billetes = {2000: 16, 5000: 7, 10000: 7, 20000: 0, 50000: 0, 100000: 0}
+
+        primero = calculator.calcular_base_y_consignacion(conteo_monedas, conteo_billetes)
+        hits_antes = _construir_base_cacheada.cache_info().hits
+        segundo = calculator.calcular_base_y_consignacion(conteo_monedas, conteo_billetes)
+
+        assert segundo == primero
+        assert _construir_base_cacheada.cache_info().hits == hits_antes + 1
+
+    def test_calcular_base_sin_cache(self, monkeypatch):
+        """Test que con el cache deshabilitado el knapsack se resuelve igual"""
+        from app.config import Config
+        from app.services.cash_calculator import _construir_base_cacheada
+
+        calculator = CashCalculator(base_objetivo=50000, umbral_menudo=10000)
+        conteo_monedas = {50: 0, 100: 6, 200: 40, 500: 1, 1000: 0}
+        conteo_billetes = {2000: 16, 5000: 7, 10000: 7, 20000: 0, 50000: 0, 100000: 0}
+        con_cache = calculator.calcular_base_y_consignacion(conteo_monedas, conteo_billetes)
+
+        monkeypatch.setattr(Config, 'KNAPSACK_CACHE_ENABLED', False)
+        info_antes = _construir_base_cacheada.cache_info()
+        sin_cache = calculator.calcular_base_y_consignacion(conteo_monedas, conteo_billetes)
+
+        assert sin_cache == con_cache
+        assert _construir_base_cacheada.cache_info() == info_antes
+
+    def test_calcular_base_total_menor_a_base(self):
+        """Test que con efectivo insuficiente todo va a la base sin consignar"""
+        calculator = CashCalculator(base_objetivo=450000, umbral_menudo=10000)
+        conteo_monedas = {50: 0, 100: 6, 200: 40, 500: 1, 1000: 0}
+        conteo_billetes = {2000: 16, 5000: 7, 10000: 7, 20000: 0, 50000: 0, 100000: 0}
+
+        resultado, consignar = calculator.calcular_base_y_consignacion(conteo_monedas, conteo_billetes)
+
+        # Total: 600 + 8000 + 500 + 32000 + 35000 + 70000 = 146100
+        assert resultado['total_base'] == 146100
+        assert resultado['base_monedas'] == conteo_monedas
+        assert resultado['exact_base_obtained'] is False
+        assert resultado['restante_para_base'] == 450000 - 146100
+        assert resultado['base_status'] == 'faltante'
+        assert consignar['total_consignar_sin_ajustes'] == 0
+
+    def test_calculator_sin_dict_por_instancia(self):
+        """Test que el calculador usa __slots__ y rechaza atributos nuevos"""
+        calculator = CashCalculator()
+
+        assert not hasattr(calculator, '__dict__')
+        with pytest.raises(AttributeError):
+            calculator.atributo_inexistente = 1
+
+
+class TestProcesarExcedentes:
+    EXCEDENTES = [
+        {"tipo": "efectivo", "subtipo": None, "valor": 10000},
+        {"tipo": "qr_transferencias", "subtipo": "nequi", "valor": 5000},
+    ]
+
+    def test_totales_y_detalle(self):
+        """Test totales por tipo y detalle de excedentes"""
+        resultado = procesar_excedentes(self.EXCEDENTES)
+
+        assert resultado["total_excedente"] == 15000
+        assert resultado["excedente_efectivo"] == 10000
+        assert resultado["excedente_nequi"] == 5000
+        assert resultado["excedentes_detalle"] == [
+            {"tipo": "Efectivo", "valor": 10000},
+            {"tipo": "Transferencia", "subtipo": "Nequi", "valor": 5000},
+        ]
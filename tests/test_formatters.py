@@ -58,6 +58,12 @@ class TestFormatCOP:
     def test_format_cop_zero(self):
         assert format_cop(0) == "$0"
 
+    def test_format_cop_cached_value_is_stable(self):
+        assert format_cop(450000) == format_cop(450000) == format_cop(450000.0)
+
+    def test_format_cop_unhashable(self):
+        assert format_cop([1]) == "$[1]"
+
 
 class TestNormalizePaymentMethod:
     def test_normalize_credit_card(self):
@@ -0,0 +1,211 @@
+"""
+Tests para el procesador de archivos de inventario
+"""
+import io
+from decimal import Decimal
+
+import openpyxl
+
+from app.services.inventory_file_processor import InventoryFileProcessor
+
+
+EXPORT_HEADER = 'Tipo;Nombre;Categoría;Estado;Costo inicial;Precio base'
+INVENTORY_HEADER = 'Categoría;Ítem;Estado;Cantidad;Costo promedio;Total'
+
+
+def _csv_bytes(*lines: str, newline: str = '\n') -> bytes:
+    """Arma el contenido de un CSV en latin-1, como lo exporta Alegra"""
+    return newline.join(lines).encode('latin-1')
+
+
+def _excel_bytes(*rows) -> bytes:
+    """Arma un libro de Excel en memoria con las filas dadas"""
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+class TestParseDecimal:
+    def test_formatos_numericos(self):
+        """Test coma decimal, separador de miles y valores con comillas de Excel"""
+        assert InventoryFileProcessor.parse_decimal('12.500,50') == Decimal('12500.50')
+        assert InventoryFileProcessor.parse_decimal('1,5') == Decimal('1.5')
+        assert InventoryFileProcessor.parse_decimal('"=3400"') == Decimal('3400')
+        assert InventoryFileProcessor.parse_decimal('  ') == Decimal('0')
+        assert InventoryFileProcessor.parse_decimal('abc') == Decimal('0')
+
+
+class TestTotalesExactos:
+    def test_totales_con_montos_fraccionarios(self):
+        """Test que los totales de dinero no acumulan error de redondeo"""
+        contenido = _csv_bytes(
+            EXPORT_HEADER,
+            'Producto;Blusa;Mujer;Activo;0,1;100,68',
+            'Producto;Blusa 2;Mujer;Activo;0,2;0,2',
+            'Producto;Blusa 3;Mujer;Activo;52;0,3',
+        )
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        resumen = resultado['resumen_general']
+        assert resumen['valor_total_costo'] == 52.3
+        assert resumen['valor_total_precio'] == 101.18
+        assert resumen['margen_total'] == 48.88
+
+        mujer = resultado['por_departamento']['mujer']
+        assert mujer['valor_costo'] == 52.3
+        assert mujer['valor_precio'] == 101.18
+        assert mujer['items'][0]['margen'] == 100.58
+
+
+class TestEstructuraExportacion:
+    def test_exportacion_basica(self):
+        """Test exportación de productos: filtra tipos, inactivos y nombres con asterisco"""
+        contenido = _csv_bytes(
+            EXPORT_HEADER,
+            'Producto;Camisa Hombre;Hombre;Activo;20000;50000',
+            'Variante;Camisa Hombre M;Hombre;Activo;20000;50000',
+            'Servicio;Arreglo;Hombre;Activo;0;10000',
+            'Producto;Camisa vieja;Hombre;Inactivo;20000;50000',
+            'Producto;*Descontinuada;Hombre;Activo;20000;50000',
+            'Producto;Gorra;Accesorios;Activo;5000;15000',
+        )
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        assert resultado['success'] is True
+        assert 'tipo_archivo' not in resultado
+        resumen = resultado['resumen_general']
+        assert resumen['total_items'] == 3
+        assert resumen['valor_total_costo'] == 45000
+        assert resumen['valor_total_precio'] == 115000
+        assert resumen['total_categorias'] == 2
+        assert resultado['por_departamento']['hombre']['cantidad'] == 2
+        assert resultado['por_departamento']['accesorios']['cantidad'] == 1
+        assert [d['nombre'] for d in resultado['departamentos_ordenados']] == ['hombre', 'accesorios']
+
+    def test_alias_de_columnas_en_minusculas(self):
+        """Test que los encabezados en minúsculas se resuelven a los mismos campos"""
+        contenido = _csv_bytes(
+            'tipo,nombre,categoria,estado,costo_inicial,precio_base',
+            'producto,Blusa,Mujer,activo,10000,25000',
+            'variante,Falda,Mujer,inactivo,10000,25000',
+        )
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        resumen = resultado['resumen_general']
+        assert resumen['total_items'] == 1
+        assert resumen['valor_total_costo'] == 10000
+        assert resumen['valor_total_precio'] == 25000
+        assert resultado['por_departamento']['mujer']['items'][0]['nombre'] == 'Blusa'
+
+
+class TestEstructuraInventario:
+    def test_inventario_basico(self):
+        """Test inventario de Alegra: unidades, costo por cantidad y activos"""
+        contenido = _csv_bytes(
+            INVENTORY_HEADER,
+            'Hombre;Jean Hombre;Activo;3;40000;120000',
+            'Mujer;Blusa;Activo;2;15000;30000',
+            'Mujer;Vestido;Inactivo;5;15000;75000',
+            'Mujer;*Blusa rota;Activo;1;15000;15000',
+        )
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        assert resultado['tipo_archivo'] == 'inventario_alegra'
+        resumen = resultado['resumen_general']
+        assert resumen['total_items'] == 2
+        assert resumen['total_unidades'] == 5
+        assert resumen['items_activos'] == 2
+        assert resumen['items_inactivos'] == 0
+        assert resumen['valor_total_inventario'] == 150000
+        assert resumen['costo_total_inventario'] == 150000
+        assert resultado['por_departamento']['hombre']['costo_total'] == 120000
+        assert len(resultado['items_completos']) == 2
+
+    def test_cantidad_items_con_mas_de_diez(self):
+        """Test que cantidad_items cuenta todos los items aunque la muestra sea de 10"""
+        filas = [f'Mujer;Blusa {i};Activo;1;1000;1000' for i in range(15)]
+        contenido = _csv_bytes(INVENTORY_HEADER, *filas)
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        mujer = resultado['por_departamento']['mujer']
+        assert mujer['cantidad_items'] == 15
+        assert mujer['cantidad_unidades'] == 15
+        assert len(mujer['items']) == 10
+        assert len(resultado['items_completos']) == 15
+
+
+class TestFormatoCSV:
+    def test_punto_y_coma_crlf_e_indicador_de_separador(self):
+        """Test archivo con ?sep=;, fin de línea CRLF y separador punto y coma"""
+        contenido = _csv_bytes(
+            '?sep=;',
+            EXPORT_HEADER,
+            'Producto;Blusa;Mujer;Activo;10000;25000',
+            'Producto;Gorra;Accesorios;Activo;5000;15000',
+            newline='\r\n',
+        )
+
+        resultado = InventoryFileProcessor.process_csv_file(contenido)
+
+        resumen = resultado['resumen_general']
+        assert resumen['total_items'] == 2
+        assert resumen['valor_total_precio'] == 40000
+        assert resultado['por_departamento']['accesorios']['items'][0]['precio'] == 15000
+
+    def test_archivo_vacio(self):
+        """Test que un archivo vacío devuelve un resumen en cero"""
+        resultado = InventoryFileProcessor.process_csv_file(b'')
+
+        assert resultado['success'] is True
+        assert resultado['resumen_general']['total_items'] == 0
+        assert resultado['resumen_general']['margen_porcentaje'] == 0
+        assert resultado['por_departamento'] == {}
+
+    def test_solo_encabezados(self):
+        """Test que un archivo con solo encabezados devuelve un resumen en cero"""
+        resultado = InventoryFileProcessor.process_csv_file(_csv_bytes(INVENTORY_HEADER))
+
+        assert resultado['success'] is True
+        assert resultado['resumen_general']['total_items'] == 0
+        assert resultado['por_departamento'] == {}
+        assert resultado['departamentos_ordenados'] == []
+
+
+class TestFormatoExcel:
+    def test_inventario_en_excel(self):
+        """Test libro de Excel con estructura de inventario y valores numéricos"""
+        contenido = _excel_bytes(
+            ('Categoría', 'Ítem', 'Estado', 'Cantidad', 'Costo promedio', 'Total'),
+            ('Hombre', 'Jean Hombre', 'Activo', 3, 40000, 120000),
+            ('Mujer', 'Blusa', 'Activo', 2, 15000.5, 30001),
+        )
+
+        resultado = InventoryFileProcessor.process_file(io.BytesIO(contenido), 'inventario.xlsx')
+
+        assert resultado['tipo_archivo'] == 'inventario_alegra'
+        resumen = resultado['resumen_general']
+        assert resumen['total_items'] == 2
+        assert resumen['total_unidades'] == 5
+        assert resumen['valor_total_inventario'] == 150001
+        assert resumen['costo_total_inventario'] == 150001
+
+    def test_excel_sin_filas_de_datos(self):
+        """Test libro de Excel con solo la fila de encabezados"""
+        contenido = _excel_bytes(
+            ('Tipo', 'Nombre', 'Categoría', 'Estado', 'Costo inicial', 'Precio base'),
+        )
+
+        resultado = InventoryFileProcessor.process_excel_file(contenido)
+
+        assert resultado['success'] is True
+        assert resultado['resumen_general']['total_items'] == 0
+        assert resultado['por_departamento'] == {}
@@ -0,0 +1,53 @@
+"""
+Tests para el servicio de tokens JWT
+"""
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from app.services.jwt_service import JWTService
+
+
+class TestJWTService:
+    def test_generar_y_verificar_token(self, app):
+        """Test ida y vuelta: el token generado se valida con la misma configuración"""
+        with app.app_context():
+            token = JWTService.generate_token(7, 'caja@koaj.co', 'admin')
+            payload = JWTService.verify_token(token)
+
+        assert payload['userId'] == 7
+        assert payload['email'] == 'caja@koaj.co'
+        assert payload['role'] == 'admin'
+
+    def test_expiracion_en_utc(self, app):
+        """Test que exp se calcula en UTC a partir de JWT_EXPIRATION_HOURS"""
+        antes = datetime.now(timezone.utc).replace(microsecond=0)
+        with app.app_context():
+            payload = JWTService.verify_token(JWTService.generate_token(1, 'a@b.co', 'user'))
+        despues = datetime.now(timezone.utc)
+
+        horas = app.config['JWT_EXPIRATION_HOURS']
+        exp = datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
+        iat = datetime.fromtimestamp(payload['iat'], tz=timezone.utc)
+
+        assert antes <= iat <= despues
+        assert exp - iat == timedelta(hours=horas)
+
+    def test_token_expirado(self, app):
+        """Test que un token vencido se rechaza"""
+        with app.app_context():
+            secret = app.config['JWT_SECRET_KEY']
+            vencido = datetime.now(timezone.utc) - timedelta(minutes=1)
+            token = jwt.encode({'userId': 1, 'exp': vencido}, secret, algorithm='HS256')
+
+            with pytest.raises(jwt.ExpiredSignatureError):
+                JWTService.verify_token(token)
+
+    def test_configuracion_resuelta_al_crear_la_app(self, app):
+        """Test que la configuración JWT queda fija desde create_app"""
+        with app.app_context():
+            token = JWTService.generate_token(1, 'a@b.co', 'user')
+            app.config['JWT_SECRET_KEY'] = 'otro-secreto-que-no-debe-usarse-aqui'
+
+            assert JWTService.verify_token(token)['userId'] == 1
@@ -61,6 +61,50 @@ class TestKnapsackSolver:
         assert exacto is False
         assert restante > 0
 
+    def test_resolver_total_igual_al_objetivo(self):
+        """Test que con efectivo justo para la base se usa todo y nada se consigna"""
+        solver = KnapsackSolver(objetivo=71700, umbral_menudo=10000)
+
+        todas_denoms = {200: 1, 500: 3, 5000: 2, 10000: 2, 20000: 2}
+
+        conteo_base, conteo_consignar, restante, exacto = solver.resolver(todas_denoms)
+
+        assert conteo_base == todas_denoms
+        assert all(c == 0 for c in conteo_consignar.values())
+        assert restante == 0
+        assert exacto is True
+
+    def test_resolver_objetivo_no_multiplo_del_mcd(self):
+        """Test objetivo que no es múltiplo del MCD de las denominaciones"""
+        solver = KnapsackSolver(objetivo=12345, umbral_menudo=10000)
+
+        todas_denoms = {50: 10, 100: 10, 2000: 3, 5000: 1}
+
+        conteo_base, conteo_consignar, restante, exacto = solver.resolver(todas_denoms)
+
+        # Lo más cercano alcanzable con múltiplos de 50 es 12300
+        total_base = sum(d * c for d, c in conteo_base.items())
+        assert total_base == 12300
+        assert restante == 45
+        assert exacto is False
+
+    def test_resolver_no_usa_mas_unidades_de_las_disponibles(self):
+        """Test que la reconstrucción no repite items al superar el objetivo"""
+        solver = KnapsackSolver(objetivo=200000, umbral_menudo=10000)
+
+        todas_denoms = {
+            50: 5, 100: 3, 500: 9, 1000: 5, 2000: 4,
+            5000: 3, 10000: 7, 20000: 4, 50000: 1
+        }
+
+        conteo_base, conteo_consignar, restante, exacto = solver.resolver(todas_denoms)
+
+        assert sum(d * c for d, c in conteo_base.items()) == 200000
+        assert exacto is True
+        for denom in todas_denoms:
+            assert 0 <= conteo_base[denom] <= todas_denoms[denom]
+            assert conteo_consignar[denom] >= 0
+
 
 class TestConstruirBaseExacta:
     """Tests de la función helper"""